@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Honeypot Management System — non-interactive entry point
+Same actions as main_menu_for_honeypots.py, driven by arguments (see menu/cli.py).
+"""
+import sys
+
+from menu.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
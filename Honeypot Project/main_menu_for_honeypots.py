@@ -5,24 +5,29 @@ Imports all functionality from the menu/ package.
 """
 from colorama import Fore, Style, init
 
-from menu.utils import clear_screen, print_header, print_separator, pause, check_aa_profile
+from menu.utils import clear_screen, print_header, print_separator, pause, check_aa_profile, print_aa_profile_status
 from menu.vanilla import vanilla_menu_handler
 from menu.container import docker_compose_menu_handler
 from menu.export import export_logs
 from menu.killswitch import display_killswitch_menu, killswitch_restore
 #from menu.analyse import run_analysis
-from menu.process_data import run_analysis
+# menu.process_data / menu.batch (pandas, matplotlib) are imported when [A] / [B] is chosen,
+#   so the menu - and the killswitch - comes up without waiting on them
 init(autoreset=True)
 
 
 def display_main_menu():
     clear_screen()
     print_header("HONEYPOT MANAGEMENT SYSTEM")
+    # Shows the last finished check, and checks again until the profile is seen loaded
+    print_aa_profile_status()
+    check_aa_profile()
     print(f"{Fore.GREEN}[1]{Style.RESET_ALL} Manage Vanilla Honeypot")
     print(f"{Fore.GREEN}[2]{Style.RESET_ALL} Manage Sandboxed Honeypot (Docker Compose)\n")
     print(f"{Fore.YELLOW}[E]{Style.RESET_ALL} Export Experimental Logs")
 
     print(f"{Fore.YELLOW}[A]{Style.RESET_ALL} Analyse Experiment")
+    print(f"{Fore.YELLOW}[B]{Style.RESET_ALL} Batch Analyse All Experiments")
     print(f"{Fore.YELLOW}[R]{Style.RESET_ALL} Restore Network & Docker\n")
     print(f"{Fore.RED}[K]{Style.RESET_ALL} KILLSWITCH")
     print(f"{Fore.RED}[0]{Style.RESET_ALL} Exit")
@@ -30,8 +35,6 @@ def display_main_menu():
 
 
 def main():
-    check_aa_profile()
-
     while True:
         display_main_menu()
         choice = input(f"{Fore.CYAN}Enter choice> {Style.RESET_ALL}").strip()
@@ -59,7 +62,11 @@ def main():
         elif choice in ('r', 'R'):
             killswitch_restore()
         elif choice in ('a', 'A'):
-             run_analysis()
+            from menu.process_data import run_analysis
+            run_analysis()
+        elif choice in ('b', 'B'):
+            from menu.batch import run_batch_analysis
+            run_batch_analysis()
         else:
             clear_screen()
             print(f"\n{Fore.RED}ERROR: Invalid choice{Style.RESET_ALL}")
@@ -0,0 +1,206 @@
+# ============================================================================
+# align.py - Myers O(ND) alignment of vanilla vs containerised command streams
+# Sessions are paired by connect order (the same attack is replayed against
+#   both honeypots) and each pair's commands are diffed as sequences, so
+#   order, repetition and per-session structure all count. Commands only one
+#   side ran are reported as inserted / deleted, commands both ran at
+#   different points as moved, each with its time since session connect.
+# ============================================================================
+from array import array
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Edit distance the exact diff gives up at - trace memory grows with its square.
+#   Beyond it the pair is aligned position by position and flagged approximate
+MAX_EDITS = 2000
+ALIGNMENT_COLUMNS = ["pair", "vanilla_session", "containerised_session", "op", "command",
+                     "vanilla_time", "containerised_time", "delta"]
+EQUAL, DELETE, INSERT, MOVE = 0, 1, 2, 3
+
+
+def myers_diff(a: list, b: list, max_edits: int = MAX_EDITS):
+    """Shortest edit script from a to b as (op, a_index, b_index) tuples, -1 for no index.
+    a and b are lists of int tokens. Returns None when more than max_edits edits are needed"""
+    n, m = len(a), len(b)
+    # Common prefix / suffix cost nothing to match and are most of a replayed attack
+    start = 0
+    while start < n and start < m and a[start] == b[start]: start += 1
+    end_a, end_b = n, m
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    prefix = [(EQUAL, i, i) for i in range(start)]
+    suffix = [(EQUAL, end_a + i, end_b + i) for i in range(n - end_a)]
+    a, b = a[start:end_a], b[start:end_b]
+    n, m = len(a), len(b)
+
+    max_d = min(n + m, max_edits)
+    offset = max_d + 1
+    v = array("l", [0]) * (2 * max_d + 3)
+    trace = []      # v after each round d, keys -d..d
+    found = None
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]           # down: insert b[y]
+            else:
+                x = v[offset + k - 1] + 1       # right: delete a[x]
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                found = d
+                break
+        if found is not None: break
+        trace.append(v[offset - d: offset + d + 1])
+    if found is None: return None
+
+    # Walk the trace back from (n, m), one edit per round
+    script = []
+    x, y = n, m
+    for d in range(found, 0, -1):
+        prev = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and prev[k - 1 + d - 1] < prev[k + 1 + d - 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = prev[prev_k + d - 1]
+        prev_y = prev_x - prev_k
+        mid_x, mid_y = (prev_x, prev_y + 1) if prev_k == k + 1 else (prev_x + 1, prev_y)
+        while x > mid_x and y > mid_y:
+            x -= 1
+            y -= 1
+            script.append((EQUAL, start + x, start + y))
+        script.append((INSERT, -1, start + prev_y) if prev_k == k + 1 else (DELETE, start + prev_x, -1))
+        x, y = prev_x, prev_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        script.append((EQUAL, start + x, start + y))
+    script.reverse()
+    return prefix + script + suffix
+
+
+def _positional_script(a: list, b: list) -> list:
+    """Fallback when the streams are too far apart for the exact diff: compare index by index"""
+    script = []
+    for i in range(min(len(a), len(b))):
+        if a[i] == b[i]:
+            script.append((EQUAL, i, i))
+        else:
+            script += [(DELETE, i, -1), (INSERT, -1, i)]
+    script += [(DELETE, i, -1) for i in range(len(b), len(a))]
+    script += [(INSERT, -1, i) for i in range(len(a), len(b))]
+    return script
+
+
+def session_offsets(cmds: pd.DataFrame, sessions: pd.DataFrame) -> np.ndarray:
+    """Seconds from session connect to each command (first command when connect is missing)"""
+    if cmds.empty: return np.array([], dtype=float)
+    connect = sessions.set_index(sessions["session"].astype(str))["connect_time"]
+    session = cmds["session"].astype(str)
+    zero = session.map(connect)
+    zero = zero.fillna(cmds.groupby(session, sort=False)["timestamp"].transform("min"))
+    return (cmds["timestamp"] - zero).dt.total_seconds().to_numpy()
+
+
+def align_commands(v_cmds: pd.DataFrame, c_cmds: pd.DataFrame,
+                   v_sessions: pd.DataFrame, c_sessions: pd.DataFrame) -> pd.DataFrame:
+    """One row per aligned command: op is equal / inserted (containerised only) /
+    deleted (vanilla only) / moved (both, at a different point). df.attrs["approximate"]
+    lists pairs that fell back to positional alignment"""
+    # Intern commands as ints so the diff compares small numbers, not strings
+    codes, uniques = pd.factorize(pd.concat([v_cmds["input"].astype(str), c_cmds["input"].astype(str)],
+                                            ignore_index=True))
+    v_codes, c_codes = codes[:len(v_cmds)], codes[len(v_cmds):]
+    v_times, c_times = session_offsets(v_cmds, v_sessions), session_offsets(c_cmds, c_sessions)
+    v_rows = v_cmds.groupby(v_cmds["session"].astype(str), sort=False).indices if not v_cmds.empty else {}
+    c_rows = c_cmds.groupby(c_cmds["session"].astype(str), sort=False).indices if not c_cmds.empty else {}
+
+    v_ids = [str(s) for s in v_sessions["session"]]
+    c_ids = [str(s) for s in c_sessions["session"]]
+    pairs = max(len(v_ids), len(c_ids))
+    empty = np.array([], dtype=np.intp)
+
+    ops, v_pos, c_pos, pair_no, approximate = [], [], [], [], []
+    for pair in range(pairs):
+        v_index = v_rows.get(v_ids[pair], empty) if pair < len(v_ids) else empty
+        c_index = c_rows.get(c_ids[pair], empty) if pair < len(c_ids) else empty
+        a, b = v_codes[v_index].tolist(), c_codes[c_index].tolist()
+        script = myers_diff(a, b)
+        if script is None:
+            script = _positional_script(a, b)
+            approximate.append(pair)
+        if not script: continue
+        op, i, j = (np.array(column) for column in zip(*script))
+
+        # A deleted command the other side ran elsewhere in the session is a move, not an edit
+        deleted, inserted = np.flatnonzero(op == DELETE), np.flatnonzero(op == INSERT)
+        waiting = {}
+        for position in deleted:
+            waiting.setdefault(a[i[position]], deque()).append(position)
+        keep = np.ones(len(op), dtype=bool)
+        for position in inserted:
+            candidates = waiting.get(b[j[position]])
+            if candidates:
+                partner = candidates.popleft()
+                i[position] = i[partner]
+                op[position] = MOVE
+                keep[partner] = False
+        op, i, j = op[keep], i[keep], j[keep]
+
+        ops.append(op)
+        v_pos.append(np.where(i >= 0, v_index[np.maximum(i, 0)] if len(v_index) else -1, -1))
+        c_pos.append(np.where(j >= 0, c_index[np.maximum(j, 0)] if len(c_index) else -1, -1))
+        pair_no.append(np.full(len(op), pair))
+
+    if not ops:
+        alignment = pd.DataFrame(columns=ALIGNMENT_COLUMNS)
+        alignment.attrs["approximate"] = approximate
+        return alignment
+    op, v_at, c_at, pair = (np.concatenate(parts) for parts in (ops, v_pos, c_pos, pair_no))
+    has_v, has_c = v_at >= 0, c_at >= 0
+    vanilla_time = np.where(has_v, v_times[np.maximum(v_at, 0)] if len(v_times) else np.nan, np.nan)
+    containerised_time = np.where(has_c, c_times[np.maximum(c_at, 0)] if len(c_times) else np.nan, np.nan)
+    command = np.where(has_v, v_codes[np.maximum(v_at, 0)] if len(v_codes) else -1,
+                       c_codes[np.maximum(c_at, 0)] if len(c_codes) else -1)
+
+    alignment = pd.DataFrame({
+        "pair": pair,
+        "vanilla_session": pd.Categorical(np.array(v_ids + [""] * (pairs - len(v_ids)), dtype=object)[pair]),
+        "containerised_session": pd.Categorical(np.array(c_ids + [""] * (pairs - len(c_ids)), dtype=object)[pair]),
+        "op": pd.Categorical.from_codes(op, ["equal", "deleted", "inserted", "moved"]),
+        "command": np.asarray(uniques, dtype=object)[command],
+        "vanilla_time": vanilla_time,
+        "containerised_time": containerised_time,
+        "delta": containerised_time - vanilla_time,
+    })
+    alignment.attrs["approximate"] = approximate
+    return alignment
+
+
+def alignment_summary(alignment: pd.DataFrame) -> pd.DataFrame:
+    """Per session pair: counts of each op and the median / max timing delta of shared commands"""
+    if alignment.empty:
+        return pd.DataFrame(columns=["pair", "vanilla_session", "containerised_session",
+                                     "equal", "deleted", "inserted", "moved", "median_delta", "max_delta"])
+    counts = pd.crosstab(alignment["pair"], alignment["op"]).reindex(
+        columns=["equal", "deleted", "inserted", "moved"], fill_value=0)
+    grouped = alignment.groupby("pair", sort=True)
+    summary = pd.concat([
+        grouped[["vanilla_session", "containerised_session"]].first(),
+        counts,
+        grouped["delta"].median().rename("median_delta"),
+        grouped["delta"].apply(lambda delta: delta.abs().max()).rename("max_delta"),
+    ], axis=1)
+    return summary.reset_index()
+
+
+def streams_match(alignment: pd.DataFrame) -> bool:
+    """True when every paired session ran the same commands in the same order"""
+    return bool((alignment["op"] == "equal").all()) if not alignment.empty else True
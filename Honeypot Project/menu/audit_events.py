@@ -0,0 +1,122 @@
+# ============================================================================
+# audit_events.py - One row per audit event from its correlated records
+# auditd writes one AppArmor denial / seccomp kill as several records that
+#   share msg=audit(<time>:<serial>): the AVC or SECCOMP record itself, then
+#   SYSCALL (arch, syscall, exe), CWD, one PATH per file and PROCTITLE (the
+#   hex-encoded argv). The log is read once, line by line: records are
+#   hashed on their (time, serial) id, and since an event's records are
+#   written together only the last PENDING_EVENTS events are held. When an
+#   event leaves that window its records are joined into one row - and only
+#   events with an AVC / SECCOMP record are ever split into fields.
+# ============================================================================
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from menu.syscalls import syscall_names
+from menu.utils_process_data import compact_frame
+
+# type=SYSCALL msg=audit(1775917844.595:856): arch=c000003e syscall=257 ...
+AUDIT_RECORD = re.compile(r"^type=(?P<type>[A-Z_]+) msg=audit\((?P<timestamp_part>\d+\.\d+):(?P<serial>\d+)\):")
+# Every key=value / key="value" pair after the header, the value with its quotes (findall is fastest)
+RECORD_FIELD = re.compile(r"(\w+)=(\"[^\"]*\"|\S+)")
+# Records an event is reported for, and the records joined onto them
+ANCHOR_TYPES = ["AVC", "SECCOMP"]
+COMPANION_FIELDS = {
+    "SYSCALL": ["arch", "syscall", "success", "exit", "ppid", "pid", "uid", "comm", "exe"],
+    "CWD": ["cwd"],
+    "PROCTITLE": ["proctitle"],
+}
+# Untrusted strings are logged quoted when printable, otherwise as bare hex (audit_log_untrustedstring)
+ENCODED_FIELDS = {"name", "cwd", "exe", "comm", "proctitle"}
+HEX = re.compile(r"^(?:[0-9A-Fa-f]{2})+$")
+# Events whose records are still being collected - older ones are complete and joined
+PENDING_EVENTS = 1000
+EVENT_COLUMNS = ["timestamp", "serial", "type", "records", "pid", "comm", "exe", "argv", "cwd", "arch",
+                 "syscall", "syscall_name", "success", "operation", "profile", "name", "paths",
+                 "denied_mask", "sig"]
+
+
+def _decode(value: str) -> str:
+    """Bare hex -> text, NUL separators (argv) as spaces"""
+    return bytes.fromhex(value).replace(b"\0", b" ").decode(errors="replace").strip()
+
+
+def _record_fields(line: str, start: int) -> dict:
+    """key -> value of one record after its header, hex-encoded strings decoded. First of a repeated key wins"""
+    fields = {}
+    for key, value in RECORD_FIELD.findall(line, start):
+        if key in fields: continue
+        if value.startswith('"'):
+            value = value[1:-1]
+        elif key in ENCODED_FIELDS and HEX.match(value):
+            value = _decode(value)
+        fields[key] = value
+    return fields
+
+
+def _event_row(event: tuple, records: list) -> dict:
+    """Join one event's (type, line, header end) records into its wide row, or None without an anchor"""
+    anchor = next(((line, end, record_type) for record_type, line, end in records
+                   if record_type in ANCHOR_TYPES), None)
+    if anchor is None: return None
+    row = _record_fields(anchor[0], anchor[1])
+    row.update(timestamp_part=event[0], serial=event[1], type=anchor[2], records=len(records))
+    paths = []
+    for record_type, line, end in records:
+        if record_type == "PATH":
+            name = _record_fields(line, end).get("name")
+            if name is not None: paths.append(name)
+        elif record_type in COMPANION_FIELDS:
+            fields = _record_fields(line, end)
+            # The anchor's own value wins (SECCOMP carries exe / syscall itself)
+            for key in COMPANION_FIELDS[record_type]:
+                if key in fields: row.setdefault(key, fields[key])
+    if paths: row["paths"] = ", ".join(paths)
+    return row
+
+
+def correlate_audit_lines(lines) -> pd.DataFrame:
+    """One wide row per AVC / SECCOMP event: exe, argv, cwd, syscall (named for its arch), paths.
+    lines is any iterable of str, read once"""
+    pending = {}        # event id -> its records so far, in arrival order (the hash table)
+    rows = []
+    for line in lines:
+        header = AUDIT_RECORD.match(line)
+        if not header: continue
+        record_type = header["type"]
+        if record_type not in ANCHOR_TYPES and record_type not in COMPANION_FIELDS and record_type != "PATH":
+            continue
+        # The serial restarts with auditd, so an event is identified by (time, serial)
+        event = (header["timestamp_part"], header["serial"])
+        records = pending.get(event)
+        if records is None:
+            records = pending[event] = []
+            # auditd writes an event's records together: events this far back are complete
+            if len(pending) > PENDING_EVENTS:
+                oldest = next(iter(pending))
+                row = _event_row(oldest, pending.pop(oldest))
+                if row is not None: rows.append(row)
+        records.append((record_type, line, header.end()))
+    rows += [row for row in (_event_row(event, records) for event, records in pending.items()) if row is not None]
+    if not rows: return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    events = pd.DataFrame(rows).reindex(columns=EVENT_COLUMNS + ["proctitle", "timestamp_part"])
+    events["argv"] = events["proctitle"]
+    events["serial"] = pd.to_numeric(events["serial"]).astype("int64")
+    # Via integer ms like parse_aa_lines, so 1775917844.595 does not become .594999933
+    events["timestamp"] = pd.to_datetime(pd.to_numeric(events["timestamp_part"].str.replace(".", "", regex=False)),
+                                         unit="ms", utc=True)
+    events["syscall_name"] = np.where(events["syscall"].notna(),
+                                      syscall_names(events["arch"], events["syscall"]).astype(object), None)
+    events = events[EVENT_COLUMNS].sort_values(["timestamp", "serial"], kind="stable").reset_index(drop=True)
+    # compact_frame drops all-NaN columns (no PROCTITLE records staged), the schema is fixed
+    return compact_frame(events).reindex(columns=EVENT_COLUMNS)
+
+
+def parse_audit_events(path: Path) -> pd.DataFrame:
+    if not path.exists() or path.stat().st_size == 0: return pd.DataFrame()
+    with open(path, errors="replace") as f:
+        return correlate_audit_lines(line.rstrip("\n") for line in f)
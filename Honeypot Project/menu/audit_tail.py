@@ -0,0 +1,309 @@
+# ============================================================================
+# audit_tail.py - Live audit.log tailer for the containerised honeypot
+# Follows /var/log/audit/audit.log with inotify while an experiment runs and
+#   appends cowrie-docker AVC denials and SECCOMP / BPF records (with the
+#   SYSCALL / PATH / CWD / PROCTITLE records of the same events) to the
+#   staging area as they are written. A byte cursor (inode + offset) is kept
+#   in the staging directory, so every pass reads only the bytes appended
+#   since the last one and the host audit history no longer has to be
+#   truncated between experiments. [E] export clears staging, and with it
+#   the cursor, so the next experiment starts from the end of the log.
+#   Export, the killswitch and a container restart stop the follower (and
+#   wait for it) first; a follower whose staging is cleared under it exits.
+# audit.log is root-only: the tailer runs as its own process under sudo
+#     sudo python3 -m menu.audit_tail follow <staging dir>
+#     sudo python3 -m menu.audit_tail sync <staging dir>
+# ============================================================================
+import ctypes
+import ctypes.util
+import fcntl
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from menu.config import AUDIT_LOG, SCRIPT_DIR
+
+CURSOR_NAME = ".audit_cursor.json"
+PID_NAME = ".audit_tail.pid"
+APPARMOR_NAME = "apparmor_denials.log"
+BPF_NAME = "seccomp_bpf.log"
+# Records of the container's AppArmor profile (AVC has profile=, SECCOMP has subj=)
+PROFILE = b"cowrie-docker"
+READ_BYTES = 1024 * 1024
+# Anchor (AVC / SECCOMP) event ids remembered in the cursor between passes: an event's
+#   records are separate appends, so its SYSCALL / PATH / ... may land in the next pass
+RECENT_EVENTS = 256
+# Seconds between passes when no inotify event arrives (and the whole loop without inotify)
+POLL_SECONDS = 2.0
+# Seconds stop_tailer waits for the follower's last pass
+STOP_SECONDS = 10.0
+# inotify(7) events on the audit directory: appends, and auditd's rename + create on rotation
+IN_MODIFY, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE = 0x002, 0x040, 0x080, 0x100
+
+
+def _invoker_ids() -> tuple:
+    """uid / gid of the user who ran sudo, so staged files stay removable by [E] export"""
+    return int(os.environ.get("SUDO_UID", os.getuid())), int(os.environ.get("SUDO_GID", os.getgid()))
+
+
+def _hand_back(path: Path):
+    if os.geteuid() != 0: return
+    try:
+        os.chown(path, *_invoker_ids())
+    except OSError:
+        pass
+
+
+@contextmanager
+def _locked(staged_dir: Path):
+    """One pass at a time per staging directory (the follower and a stop-time sync)"""
+    lock_path = staged_dir / f"{CURSOR_NAME}.lock"
+    with open(lock_path, "a") as lock:
+        _hand_back(lock_path)
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_cursor(staged_dir: Path):
+    """{"inode", "offset", "events"} reached by the last pass, or None before the first.
+    events are the most recent anchor event ids, oldest first"""
+    try:
+        cursor = json.loads((staged_dir / CURSOR_NAME).read_text())
+        return {"inode": int(cursor["inode"]), "offset": int(cursor["offset"]),
+                "events": [str(event) for event in cursor.get("events", [])]}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _save_cursor(staged_dir: Path, inode: int, offset: int, events: list):
+    path = staged_dir / CURSOR_NAME
+    path.with_suffix(".tmp").write_text(json.dumps({"inode": inode, "offset": offset,
+                                                    "events": events[-RECENT_EVENTS:]}))
+    os.replace(path.with_suffix(".tmp"), path)
+    _hand_back(path)
+
+
+def _rotated(audit_log: Path, inode: int):
+    """The rotated audit.log.N that used to be audit.log (auditd renames, it does not copy)"""
+    for candidate in sorted(audit_log.parent.glob(f"{audit_log.name}.*")):
+        try:
+            if candidate.stat().st_ino == inode: return candidate
+        except OSError:
+            continue
+    return None
+
+
+def _event_id(line: bytes) -> bytes:
+    """The (time:serial) of msg=audit(time:serial): - shared by every record of one event"""
+    start = line.find(b"msg=audit(")
+    return line[start + 10:line.find(b")", start)] if start >= 0 else b""
+
+
+def split_records(data: bytes, events: dict = None) -> tuple:
+    """Complete lines of data -> (AppArmor / SECCOMP events, BPF lines). An event keeps its
+    other records (SYSCALL, CWD, PATH, PROCTITLE) for menu/audit_events.py to join.
+    events ({event id: None}, insertion ordered) holds anchors from earlier passes and
+    gains this pass's, so records of an event split across two passes are still kept"""
+    lines = data.splitlines(keepends=True)
+    events = {} if events is None else events
+    for line in lines:
+        if PROFILE in line and (line.startswith(b"type=SECCOMP")
+                                or (line.startswith(b"type=AVC") and b'apparmor="DENIED"' in line)):
+            events[_event_id(line)] = None
+    apparmor, bpf = [], []
+    for line in lines:
+        if line.startswith(b"type=BPF"):
+            bpf.append(line)
+        elif events and _event_id(line) in events:
+            apparmor.append(line)
+    return b"".join(apparmor), b"".join(bpf)
+
+
+def _append(path: Path, data: bytes):
+    if not data: return
+    with open(path, "ab") as out:
+        out.write(data)
+    _hand_back(path)
+
+
+def _stage(data: bytes, staged_dir: Path, events: dict, result: dict):
+    """Append the records of whole lines to staging, counted in result"""
+    apparmor, bpf = split_records(data, events)
+    while len(events) > RECENT_EVENTS:
+        del events[next(iter(events))]      # oldest first, bounded through a long pass
+    _append(staged_dir / APPARMOR_NAME, apparmor)
+    _append(staged_dir / BPF_NAME, bpf)
+    result["bytes"] += len(data)
+    result["apparmor"] += apparmor.count(b"\n")
+    result["bpf"] += bpf.count(b"\n")
+
+
+def _stage_from(file, offset: int, complete: bool, staged_dir: Path, events: dict, result: dict) -> int:
+    """Stage from offset to EOF one READ_BYTES block at a time, a partial line carried into
+    the next block. Returns the new offset - a trailing partial line is left for the next
+    pass unless complete (a rotated file gets no more writes)"""
+    file.seek(offset)
+    carry = b""
+    while block := file.read(READ_BYTES):
+        data = carry + block
+        end = data.rfind(b"\n") + 1
+        _stage(data[:end], staged_dir, events, result)
+        offset += end
+        carry = data[end:]
+    if complete and carry:
+        _stage(carry, staged_dir, events, result)
+        offset += len(carry)
+    return offset
+
+
+def sync_audit(staged_dir: Path, audit_log: Path = AUDIT_LOG, from_end: bool = False) -> dict:
+    """One pass: stage the records appended to audit_log since the cursor, then move it.
+    Without a cursor, start from the end of the log (from_end) or read it all (a run that
+    was never followed). Returns counts of bytes read and records staged"""
+    staged_dir.mkdir(parents=True, exist_ok=True)
+    _hand_back(staged_dir)
+    result = {"bytes": 0, "apparmor": 0, "bpf": 0, "rotated": False}
+    with _locked(staged_dir), open(audit_log, "rb") as current:
+        stat = os.fstat(current.fileno())
+        cursor = load_cursor(staged_dir)
+        if cursor is None:
+            cursor = {"inode": stat.st_ino, "offset": stat.st_size if from_end else 0, "events": []}
+        events = dict.fromkeys(event.encode() for event in cursor["events"])
+
+        if cursor["inode"] != stat.st_ino:
+            # Rotated since the last pass: finish the old file, then the new one from the start
+            result["rotated"] = True
+            old = _rotated(audit_log, cursor["inode"])
+            if old is not None:
+                with open(old, "rb") as rotated:
+                    _stage_from(rotated, cursor["offset"], True, staged_dir, events, result)
+            cursor["offset"] = 0
+        elif cursor["offset"] > stat.st_size:
+            cursor["offset"] = 0        # truncated in place
+        offset = _stage_from(current, cursor["offset"], False, staged_dir, events, result)
+        _save_cursor(staged_dir, stat.st_ino, offset, [event.decode(errors="replace") for event in events])
+    return result
+
+
+def _inotify(directory: Path):
+    """inotify fd watching directory, or None where inotify is unavailable (the follower polls)"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0: return None
+        mask = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def follow(staged_dir: Path, audit_log: Path = AUDIT_LOG):
+    """Stage new records whenever the audit directory changes, until SIGTERM / SIGINT, or
+    until its pid file goes (staging cleared). The watch is on the directory so a
+    rotated-in audit.log is seen too. Every pass is from_end: a lost cursor resumes at the
+    end of the log, never re-stages its history"""
+    stopping = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.append(True))
+    pid_path = staged_dir / PID_NAME
+    sync_audit(staged_dir, audit_log, from_end=True)
+    pid_path.write_text(str(os.getpid()))
+    _hand_back(pid_path)
+    fd = _inotify(audit_log.parent)
+    try:
+        while not stopping:
+            ready = select.select([fd] if fd is not None else [], [], [], POLL_SECONDS)[0]
+            if ready:
+                # Drain the events, any change in the directory means one pass
+                try:
+                    while os.read(fd, 4096): pass
+                except BlockingIOError:
+                    pass
+            if not pid_path.exists(): return     # staging cleared, nothing to stage into
+            try:
+                sync_audit(staged_dir, audit_log, from_end=True)
+            except FileNotFoundError:
+                pass            # between auditd's rename and create
+        sync_audit(staged_dir, audit_log, from_end=True)
+    finally:
+        if fd is not None: os.close(fd)
+        pid_path.unlink(missing_ok=True)
+
+
+# ------------------------------ CONTROL FROM THE MENU ------------------------------
+def _module(*args) -> list:
+    return [sys.executable, "-m", "menu.audit_tail", *args]
+
+
+def start_tailer(staged_dir: Path) -> bool:
+    """Start the background follower for this experiment (prompts for sudo once, here)"""
+    if tailer_running(staged_dir): return True
+    staged_dir.mkdir(parents=True, exist_ok=True)
+    if subprocess.run(["sudo", "-v"]).returncode != 0: return False
+    # -n: credentials were cached just above, a background process must never prompt
+    subprocess.Popen(["sudo", "-n", *_module("follow", str(staged_dir))], cwd=SCRIPT_DIR, start_new_session=True,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return True
+
+
+def tailer_running(staged_dir: Path) -> bool:
+    try:
+        pid = int((staged_dir / PID_NAME).read_text())
+    except (OSError, ValueError):
+        return False
+    return Path(f"/proc/{pid}").exists()
+
+
+def stop_tailer(staged_dir: Path, timeout: float = STOP_SECONDS) -> bool:
+    """Stop the follower and wait for it to exit, it stages whatever is left first.
+    Returns False if it is still running after timeout"""
+    try:
+        pid = int((staged_dir / PID_NAME).read_text())
+    except (OSError, ValueError):
+        return True
+    subprocess.run(["sudo", "kill", "-TERM", str(pid)], capture_output=True)
+    deadline = time.monotonic() + timeout
+    while tailer_running(staged_dir):
+        if time.monotonic() > deadline: return False
+        time.sleep(0.1)
+    return True
+
+
+def stage_audit(staged_dir: Path):
+    """Catch staging up to now: the cursor's new bytes, or the whole log if never followed.
+    Returns sync_audit's counts, or None when audit.log could not be read"""
+    res = subprocess.run(["sudo", *_module("sync", str(staged_dir))], cwd=SCRIPT_DIR,
+                         capture_output=True, text=True)
+    if res.returncode != 0: return None
+    try:
+        return json.loads(res.stdout)
+    except ValueError:
+        return None
+
+
+def main(argv: list) -> int:
+    if len(argv) != 2 or argv[0] not in ("follow", "sync"):
+        print("usage: python3 -m menu.audit_tail follow|sync <staging dir>", file=sys.stderr)
+        return 2
+    staged_dir = Path(argv[1])
+    if argv[0] == "follow":
+        follow(staged_dir)
+    else:
+        print(json.dumps(sync_audit(staged_dir)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
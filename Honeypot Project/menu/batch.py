@@ -0,0 +1,141 @@
+# ============================================================================
+# batch.py - Analyse every experiment in results/ in one go
+# Each experiment is analysed in its own worker process with exactly the
+#   same code as [A] (report_experiment). Its printed report is written to
+#   results/<experiment>/analysis.txt next to its charts, and one row per
+#   experiment is collected into results/batch_summary.csv.
+# ============================================================================
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from fnmatch import fnmatch
+from pathlib import Path
+
+import pandas as pd
+from colorama import Fore, Style
+
+from menu.config import RESULTS_DIR
+from menu.process_data import find_dirs, report_experiment_details, summary_row
+from menu.repeats import REPEATS_NAME, runs_statistics, samples_of
+from menu.utils import clear_screen, print_header, print_separator, pause
+
+REPORT_NAME = "analysis.txt"
+SUMMARY_NAME = "batch_summary.csv"
+# colorama escape codes are stripped from the text reports
+ANSI_CODES = re.compile(r"\x1b\[[0-9;]*m")
+# Columns shown in the terminal, the CSV has them all
+SHOWN_COLUMNS = ["experiment", "vanilla_sessions", "containerised_sessions", "vanilla_commands",
+                 "containerised_commands", "commands_match", "hashes_match", "aa_denials", "seccomp_denials"]
+
+
+def select_experiments(pattern: str = "*") -> list:
+    """Experiment directories whose name matches a shell glob"""
+    return [experiment for experiment in find_dirs() if fnmatch(experiment.name, pattern)]
+
+
+def analyse_to_report(experiment_dir: Path, since=None, until=None) -> tuple:
+    """Worker: analyse one experiment (only since..until if given), write its report, return
+    (its summary row, its repeated-run samples - menu/repeats.py - or None if the analysis failed)"""
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            # Already one process per experiment, so no nested pool for the five sources
+            row, details = report_experiment_details(experiment_dir, False, since, until)
+            # Reduced to arrays here, so only the samples travel back from the worker
+            run = samples_of(experiment_dir, **(details or {}))
+    except Exception as error:
+        # One broken experiment must not take the rest of the batch down
+        row = summary_row(experiment_dir, "failed", error=f"{type(error).__name__}: {error}")
+        run = None
+        print(f"ERROR: {row['error']}", file=buffer)
+    try:
+        (experiment_dir / REPORT_NAME).write_text(ANSI_CODES.sub("", buffer.getvalue()))
+    except OSError:
+        pass
+    return row, run
+
+
+def analyse_batch(experiments: list, workers: int = None, progress=None, since=None, until=None) -> tuple:
+    """Analyse experiments across a process pool. Returns (one summary row per experiment,
+    the repeated-run samples of every experiment that did not fail).
+    progress(row) is called as each experiment finishes"""
+    rows, runs = [], []
+    if len(experiments) <= 1:
+        results = (analyse_to_report(experiment, since, until) for experiment in experiments)
+        for row, run in results:
+            rows.append(row)
+            if run is not None: runs.append(run)
+            if progress: progress(row)
+    else:
+        workers = workers or min(len(experiments), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(analyse_to_report, experiment, since, until) for experiment in experiments]
+            for future in as_completed(futures):
+                row, run = future.result()
+                rows.append(row)
+                if run is not None: runs.append(run)
+                if progress: progress(row)
+    summary = pd.DataFrame(rows, columns=list(summary_row(Path(), "").keys()))
+    # Sorted like the summary, so the statistics do not depend on which worker finished first
+    runs.sort(key=lambda run: run["experiment"])
+    return summary.sort_values("experiment", kind="stable").reset_index(drop=True), runs
+
+
+def write_summary(summary: pd.DataFrame, path: Path = None) -> Path:
+    """Write the cross-experiment table as CSV, results/batch_summary.csv by default"""
+    path = path or RESULTS_DIR / SUMMARY_NAME
+    summary.to_csv(path, index=False)
+    return path
+
+
+def print_repeats(statistics: pd.DataFrame):
+    # Mean and confidence interval of each metric, per payload run more than once
+    print(f"\n{Fore.CYAN}REPEATED RUNS{Style.RESET_ALL}")
+    print_separator()
+    if statistics.empty:
+        print("    No payload has been run more than once")
+        return
+    for (payload, profile), group in statistics.groupby(["payload", "profile"], sort=False):
+        print(f"    {payload} [{profile or 'no profile'}] - {group['runs'].iloc[0]} runs")
+        for metric, samples, mean, variance, low, high in zip(group["metric"], group["samples"], group["mean"],
+                                                              group["variance"], group["ci_low"], group["ci_high"]):
+            if not samples: continue
+            print(f"        {metric:<24} n={samples:<5} mean {mean:10.3f}  var {variance:10.3f}  "
+                  f"95% CI [{low:.3f}, {high:.3f}]")
+
+def _print_progress(row: dict):
+    status = (f"{Fore.RED}FAILED {row['error']}{Style.RESET_ALL}" if row["error"]
+              else f"{Fore.GREEN}done{Style.RESET_ALL}")
+    print(f"    {row['experiment']:<60} {status}")
+
+
+def run_batch_analysis():
+    clear_screen()
+    print_header("Batch Analysis")
+
+    pattern = input(f"{Fore.CYAN}Experiment name glob (blank for all): {Style.RESET_ALL}").strip() or "*"
+    experiments = select_experiments(pattern)
+    if not experiments:
+        print(f"{Fore.RED}ERROR: No experiments match {pattern} in: {Style.RESET_ALL} {RESULTS_DIR}")
+        pause()
+        return
+
+    print(f"{Fore.CYAN}Analysing {len(experiments)} experiment(s)...{Style.RESET_ALL}")
+    summary, runs = analyse_batch(experiments, progress=_print_progress)
+    path = write_summary(summary)
+
+    print(f"\n{Fore.CYAN}CROSS-EXPERIMENT SUMMARY{Style.RESET_ALL}")
+    print_separator()
+    print(summary[SHOWN_COLUMNS].to_string(index=False))
+
+    # Runs of the same payload pooled, with bootstrap confidence intervals (samples from the batch itself)
+    statistics = runs_statistics(runs)
+    print_repeats(statistics)
+    if not statistics.empty:
+        statistics.to_csv(RESULTS_DIR / REPEATS_NAME, index=False)
+        print(f"\n{Fore.GREEN}Repeated-run statistics written to {RESULTS_DIR / REPEATS_NAME}{Style.RESET_ALL}")
+    print(f"\n{Fore.GREEN}Summary written to {path}{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}Per-experiment reports written to <experiment>/{REPORT_NAME}{Style.RESET_ALL}")
+    pause()
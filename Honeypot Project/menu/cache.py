@@ -0,0 +1,104 @@
+# ============================================================================
+# cache.py - Columnar on-disk cache of parsed experiment dataframes
+# Each parsed log is stored under results/<experiment>/.cache/ as Feather
+#   together with a small JSON entry holding the source file's size, mtime
+#   and content hash. Re-opening an experiment whose logs have not changed
+#   loads the frames straight back. Feather only (results/ is shared and
+#   copied around, so nothing in it is unpickled): without pyarrow, or for a
+#   frame Arrow cannot store, nothing is cached.
+# ============================================================================
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from menu.logset import find_log_set
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+CACHE_DIR_NAME = ".cache"
+# Bump whenever a parser changes the frame it produces, so stale entries are dropped
+CACHE_VERSION = 8
+HASH_BLOCK = 1 << 20
+
+
+def file_digest(*paths: Path) -> str:
+    """BLAKE2b over the name + contents of each file, read in 1 MiB blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(path.name.encode())
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(HASH_BLOCK), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _entry_paths(cache_dir: Path, key: str) -> tuple:
+    return cache_dir / f"{key}.json", cache_dir / f"{key}.frame"
+
+
+def _write_frame(frame: pd.DataFrame, path: Path):
+    """Write Feather via a temp file, so a crash never leaves half a frame"""
+    tmp = path.with_suffix(".tmp")
+    frame.reset_index(drop=True).to_feather(tmp)
+    os.replace(tmp, path)
+
+
+def cached_parse(cache_dir: Path, source: Path, parser, key: str = None) -> pd.DataFrame:
+    """Return parser(source), loading it from cache_dir when the source is unchanged.
+    Fast path compares size + mtime; if only the mtime moved the content hash decides.
+    Rotations of the source (menu/logset.py) are part of the key, so a new rotation is a miss"""
+    members = find_log_set(source)
+    if not members or feather is None: return parser(source)
+    key = key or source.name
+    entry_path, frame_path = _entry_paths(cache_dir, key)
+    stats = [member.stat() for member in members]
+    size = sum(stat.st_size for stat in stats)
+    mtime_ns = max(stat.st_mtime_ns for stat in stats)
+
+    entry = None
+    if entry_path.exists() and frame_path.exists():
+        try: entry = json.loads(entry_path.read_text())
+        except (OSError, ValueError): entry = None
+        if not isinstance(entry, dict): entry = None
+
+    if entry and entry.get("version") == CACHE_VERSION and entry.get("size") == size:
+        if entry.get("mtime_ns") != mtime_ns and entry.get("hash") == file_digest(*members):
+            # Touched / copied but identical - refresh mtime so next time is the fast path
+            entry["mtime_ns"] = mtime_ns
+            try:
+                entry_path.write_text(json.dumps(entry))
+            except OSError:
+                pass            # read-only results tree: still a hit, just not a faster one next time
+        if entry.get("mtime_ns") == mtime_ns:
+            try:
+                frame = pd.read_feather(frame_path)
+            except Exception:
+                # Truncated / corrupt frame, or one written by another pandas / pyarrow: a miss
+                frame = None
+            if frame is not None:
+                # Feather does not keep attrs (e.g. malformed_lines) so they ride in the entry
+                frame.attrs.update(entry.get("attrs", {}))
+                return frame
+
+    frame = parser(source)
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        _write_frame(frame, frame_path)
+        entry_path.write_text(json.dumps({
+            "version": CACHE_VERSION,
+            "source": [str(member) for member in members],
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "hash": file_digest(*members),
+            "attrs": frame.attrs,
+        }))
+    except Exception:
+        # Read-only results/, or columns Arrow cannot store (mixed-type object columns): not cached
+        pass
+    return frame
@@ -0,0 +1,97 @@
+# ============================================================================
+# chunked.py - Out-of-core analysis for logs larger than RAM
+# Logs are streamed through menu/logset.py in fixed-size batches of lines.
+#   Each batch is parsed into a small frame, reduced to a partial summary
+#   (counters, sums and sets of unique values), and merged into a running
+#   total, so memory depends on the batch size and the number of distinct
+#   commands / hashes rather than on the size of the log.
+# ============================================================================
+from collections import Counter
+
+import pandas as pd
+
+from menu.logset import iter_line_batches
+from menu.utils_process_data import (
+    extract_commands, extract_downloads, extract_aa_denials, extract_seccomp_bpf, event_counts, rows_of,
+    denial_cube, cube_counts, session_count)
+
+# Lines per batch - ~100-300 MB of frame for cowrie.json at the default
+CHUNK_LINES = 200_000
+# Above this many bytes of log text across every source (decompressed, see
+#   process_data.experiment_bytes), [A] switches to chunked mode
+OUT_OF_CORE_BYTES = 2 * 1024 ** 3
+
+
+def merge_partials(total: dict, partial: dict) -> dict:
+    """Merge two partial summaries: numbers add, Counters add, sets union"""
+    for key, value in partial.items():
+        if key not in total:
+            total[key] = value
+        elif isinstance(value, set):
+            total[key] |= value
+        else:
+            total[key] += value
+    return total
+
+
+def summarise_events(df: pd.DataFrame) -> dict:
+    """Partial summary of one batch of cowrie.json events"""
+    partial = {
+        "events": Counter(), "malformed_lines": df.attrs.get("malformed_lines", 0),
+        "session_count": 0, "duration_sum": 0.0, "duration_count": 0,
+        "command_count": 0, "commands": set(), "download_count": 0, "hashes": set(),
+    }
+    if df.empty: return partial
+    partial["events"] = Counter(event_counts(df).to_dict())
+    partial["session_count"] = session_count(df)
+
+    if "duration" in df.columns:
+        durations = rows_of(df, "cowrie.session.closed")["duration"].dropna()
+        partial["duration_sum"] = float(durations.sum())
+        partial["duration_count"] = len(durations)
+    if "input" in df.columns:
+        commands = extract_commands(df)
+        partial["command_count"] = len(commands)
+        partial["commands"] = set(commands["input"].dropna())
+    if "shasum" in df.columns:
+        downloads = extract_downloads(df)
+        partial["download_count"] = len(downloads)
+        partial["hashes"] = set(downloads["shasum"].dropna())
+    return partial
+
+
+def summarise_log_lines(df: pd.DataFrame) -> dict:
+    """Partial summary of one batch of cowrie.log lines"""
+    if df.empty: return {"lines": 0, "command_lines": 0}
+    return {"lines": len(df), "command_lines": int(df["message"].str.startswith("CMD").sum())}
+
+
+def summarise_audit(df: pd.DataFrame) -> dict:
+    """Partial summary of one batch of AppArmor / Seccomp records"""
+    partial = {"aa_total": 0, "seccomp_total": 0, "aa_by_operation": Counter(), "aa_by_process": Counter(),
+               "seccomp_syscall": Counter(), "seccomp_by_process": Counter()}
+    if df.empty: return partial
+    denials = extract_aa_denials(df)
+    seccomp = extract_seccomp_bpf(df)
+    partial["aa_total"] = len(denials)
+    partial["seccomp_total"] = len(seccomp)
+    cube = denial_cube(denials)
+    for key, level in [("aa_by_operation", "operation"), ("aa_by_process", "comm")]:
+        if level in denials.columns:
+            partial[key] = Counter(cube_counts(cube, level).to_dict())
+    for key, frame, columns in [("seccomp_syscall", seccomp, ["syscall", "syscall_name"]),
+                                ("seccomp_by_process", seccomp, ["comm"])]:
+        if set(columns) <= set(frame.columns):
+            # Several columns count tuples, (number, name) for syscalls
+            counts = frame[columns].value_counts() if len(columns) > 1 else frame[columns[0]].value_counts()
+            partial[key] = Counter(counts[counts > 0].to_dict())
+    return partial
+
+
+def stream_summary(path, parse_batch, summarise, batch_lines: int = CHUNK_LINES, since=None, until=None) -> dict:
+    """Stream a log set in batches: parse_batch(list[bytes]) -> frame, summarise(frame) -> partial.
+    since/until skip rotations whose day is outside the window"""
+    total = summarise(pd.DataFrame())
+    for batch in iter_line_batches(path, batch_lines, since, until):
+        merge_partials(total, summarise(parse_batch(batch)))
+    return total
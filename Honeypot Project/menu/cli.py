@@ -0,0 +1,226 @@
+# ============================================================================
+# cli.py - Non-interactive command line interface
+# The same functions the menu calls, without input() / clear_screen() /
+#   pause(), so every stage can be scripted, timed and run from cron:
+#     python3 honeypot.py list
+#     python3 honeypot.py analyse --experiment 'tp-camera-*' --json
+#     python3 honeypot.py analyse -e 'A7-*' --since 2026-03-25T17:02 --until 2026-03-25T17:03
+#     python3 honeypot.py export --name mirai-arm
+#     python3 honeypot.py stage
+#     python3 honeypot.py killswitch --yes
+#     python3 honeypot.py startup
+# With --json the report text goes to stderr and stdout holds one JSON document.
+# ============================================================================
+import argparse
+import json
+import math
+import sys
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Commands import what they need when run, so `killswitch` does not wait on pandas / matplotlib
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1         # the action ran but something in it failed
+EXIT_USAGE = 2          # bad arguments / missing confirmation (argparse uses 2 too)
+EXIT_NOT_FOUND = 3      # no experiment / container to act on
+
+# Startup benchmark: a fresh interpreter importing the menu and drawing it - how long an
+#   operator waits for [K]. The median of the runs must stay within the budget, and none of
+#   the analysis dependencies may be imported on the way
+STARTUP_BUDGET = 0.25   # seconds
+STARTUP_RUNS = 5
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib"]
+STARTUP_PROBE = (
+    "import sys\n"
+    "import main_menu_for_honeypots as main_menu\n"
+    "main_menu.display_main_menu()\n"
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)\n"
+)
+
+
+def _plain(value):
+    """Make a result JSON-safe: NaN -> null, sets -> sorted lists, numpy scalars -> Python"""
+    if isinstance(value, dict): return {str(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        items = [_plain(item) for item in value]
+        return sorted(items, key=str) if isinstance(value, set) else items
+    if isinstance(value, Path): return str(value)
+    if hasattr(value, "item"): value = value.item()
+    if isinstance(value, float) and math.isnan(value): return None
+    return value
+
+
+def cmd_list(args) -> tuple:
+    from menu.process_data import find_dirs
+    experiments = [experiment.name for experiment in find_dirs()]
+    print("\n".join(experiments))
+    return {"experiments": experiments}, EXIT_OK if experiments else EXIT_NOT_FOUND
+
+
+def cmd_analyse(args) -> tuple:
+    from menu.batch import analyse_batch, analyse_to_report, select_experiments, write_summary
+    from menu.process_data import report_experiment, summary_row
+    from menu.repeats import runs_statistics
+
+    experiments = select_experiments(args.experiment)
+    if not experiments:
+        print(f"No experiment matches {args.experiment}", file=sys.stderr)
+        return {"experiments": []}, EXIT_NOT_FOUND
+
+    runs = []
+    if len(experiments) == 1 and not args.report:
+        # One experiment: print the report exactly as [A] does
+        try:
+            rows = [report_experiment(experiments[0], since=args.since, until=args.until)]
+        except Exception as error:
+            rows = [summary_row(experiments[0], "failed", error=f"{type(error).__name__}: {error}")]
+    elif len(experiments) == 1:
+        rows = [analyse_to_report(experiments[0], args.since, args.until)[0]]
+    else:
+        summary, runs = analyse_batch(experiments, workers=args.workers, since=args.since, until=args.until)
+        rows = summary.to_dict("records")
+        if args.summary:
+            print(f"Summary written to {write_summary(summary, args.summary)}", file=sys.stderr)
+
+    failed = [row["experiment"] for row in rows if isinstance(row["error"], str)]
+    # Payloads run more than once: pooled means and bootstrap intervals, from the batch's own samples
+    repeats = runs_statistics(runs).to_dict("records") if len(experiments) > 1 else []
+    return {"experiments": rows, "failed": failed, "repeats": repeats}, EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_export(args) -> tuple:
+    from menu.export import export_experiment
+    name = args.name.strip()
+    if not name:
+        print("--name must not be empty", file=sys.stderr)
+        return {}, EXIT_USAGE
+    return export_experiment(name), EXIT_OK
+
+
+def cmd_stage(args) -> tuple:
+    from menu.config import CONTAINER_NAME, STAGED_DIR
+    from menu.staging import stage_containerised_logs
+    from menu.utils import is_container_running
+    if not is_container_running(CONTAINER_NAME):
+        print(f"Container {CONTAINER_NAME} is not running - nothing to stage", file=sys.stderr)
+        return {"staged": 0}, EXIT_NOT_FOUND
+    staged = stage_containerised_logs()
+    return {"staged": staged, "staged_dir": STAGED_DIR}, EXIT_OK if staged else EXIT_FAILED
+
+
+def cmd_killswitch(args) -> tuple:
+    from menu.killswitch import activate_killswitch
+    if not args.yes:
+        print("Refusing to activate the killswitch without --yes", file=sys.stderr)
+        return {"activated": False}, EXIT_USAGE
+    result = activate_killswitch(source="menu/cli.py")
+    # Docker / Cowrie not running (None) is fine, an explicit failure (False) is not
+    failed = (not result["network_blocked"] or result["docker_stopped"] is False
+              or result["cowrie_stopped"] is False or not result["tailer_stopped"])
+    return {"activated": True, **result}, EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_restore(args) -> tuple:
+    from menu.killswitch import restore_network
+    if not args.yes:
+        print("Refusing to flush nftables and restart Docker without --yes", file=sys.stderr)
+        return {"restored": False}, EXIT_USAGE
+    result = restore_network()
+    failed = any(result.values())
+    return {"restored": not failed, **result}, EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_startup(args) -> tuple:
+    import subprocess
+    import time
+    from statistics import median
+    from menu.config import SCRIPT_DIR
+    seconds, heavy = [], set()
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        res = subprocess.run([sys.executable, "-c", STARTUP_PROBE], cwd=SCRIPT_DIR, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        seconds.append(time.perf_counter() - start)
+        if res.returncode != 0:
+            print(res.stderr, file=sys.stderr)
+            return {"startup_seconds": seconds}, EXIT_FAILED
+        # Last stderr line is the probe's (clear may complain about TERM before it)
+        lines = res.stderr.strip().splitlines()
+        heavy.update(filter(None, lines[-1].split(",")) if lines else [])
+    result = {"runs": len(seconds), "median": median(seconds), "max": max(seconds), "budget": args.budget,
+              "heavy_modules": sorted(heavy), "within_budget": median(seconds) <= args.budget and not heavy}
+    print(f"Menu startup: median {result['median']:.3f}s, max {result['max']:.3f}s over {len(seconds)} runs "
+          f"(budget {args.budget:.3f}s)")
+    if heavy:
+        print(f"Imported at startup: {', '.join(sorted(heavy))}")
+    return result, EXIT_OK if result["within_budget"] else EXIT_FAILED
+
+
+def timestamp(text: str) -> datetime:
+    """--since / --until: an ISO date or date-time, UTC when it has no offset.
+    Named for argparse's "invalid timestamp value" message"""
+    moment = datetime.fromisoformat(text)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="honeypot", description="Honeypot Management System (non-interactive)")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="print the result as JSON on stdout")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", parents=[common], help="list experiments in results/").set_defaults(run=cmd_list)
+
+    analyse = commands.add_parser("analyse", aliases=["analyze"], parents=[common],
+                                  help="analyse one experiment, or every experiment matching a glob")
+    analyse.add_argument("--experiment", "-e", default="*", help="experiment name or glob (default: all)")
+    analyse.add_argument("--workers", type=int, default=None, help="worker processes for several experiments")
+    analyse.add_argument("--report", action="store_true",
+                         help="write <experiment>/analysis.txt instead of printing a single report")
+    analyse.add_argument("--summary", type=Path, default=None,
+                         help="also write the cross-experiment summary CSV here")
+    analyse.add_argument("--since", type=timestamp, default=None,
+                         help="only events at or after this ISO date / time (UTC unless it has an offset)")
+    analyse.add_argument("--until", type=timestamp, default=None,
+                         help="only events at or before this ISO date / time")
+    analyse.set_defaults(run=cmd_analyse)
+
+    export = commands.add_parser("export", parents=[common], help="export the current logs as a new experiment")
+    export.add_argument("--name", "-n", required=True, help="experiment name (kebab-case)")
+    export.set_defaults(run=cmd_export)
+
+    commands.add_parser("stage", parents=[common],
+                        help="copy containerised logs + audit records into staging").set_defaults(run=cmd_stage)
+
+    for name, run, text in [("killswitch", cmd_killswitch, "block all traffic and stop both honeypots"),
+                            ("restore", cmd_restore, "flush the killswitch rules and restart Docker")]:
+        command = commands.add_parser(name, parents=[common], help=text)
+        command.add_argument("--yes", action="store_true", help="confirm, there is no prompt")
+        command.set_defaults(run=run)
+
+    startup = commands.add_parser("startup", parents=[common],
+                                  help="time the interactive menu's startup against its budget")
+    startup.add_argument("--runs", type=int, default=STARTUP_RUNS, help="fresh interpreters to time")
+    startup.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="median budget in seconds")
+    startup.set_defaults(run=cmd_startup)
+    return parser
+
+
+def main(argv: list = None) -> int:
+    """Run one command, returns its exit code. Each command returns (result dict, exit code)"""
+    args = build_parser().parse_args(argv)
+    if not args.json:
+        return args.run(args)[1]
+    # Keep stdout for the JSON document, the human-readable report goes to stderr
+    with redirect_stdout(sys.stderr):
+        result, code = args.run(args)
+    json.dump(_plain({"command": args.command, **result, "exit_code": code}), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,6 +30,9 @@ CONTAINER_LOG_PATH = "/home/cowrie/cowrie/var/log/cowrie"
 CONTAINER_DOWNLOADS_PATH = "/home/cowrie/cowrie/var/lib/cowrie/downloads"
 CONTAINER_TTY_PATH = "/home/cowrie/cowrie/var/lib/cowrie/tty"
 
+# HOST AUDIT LOG - AppArmor / Seccomp records of the container, followed by menu/audit_tail.py
+AUDIT_LOG = Path("/var/log/audit/audit.log")
+
 # KILLSWITCH CONFIGURATION
 KILLSWITCH_LOG = "/var/log/honeypot_killswitch.log"
 
@@ -13,9 +13,12 @@ from menu.config import(
     IMAGE_NAME, IMAGE_TAG)
 
 from menu.utils import(
-    clear_screen, print_header, pause, print_separator, is_container_running
+    clear_screen, print_header, pause, print_separator, is_container_running,
+    check_aa_profile, print_aa_profile_status
 )
 from menu.staging import clear_app_armor_logs, stage_containerised_logs
+from menu.audit_tail import start_tailer, stop_tailer
+from menu.config import STAGED_DIR
 def display_docker_compose_menu():
     """Display Docker Compose honeypot menu"""
     clear_screen()
@@ -48,6 +51,14 @@ def docker_compose_build_and_run(detached=True):
         print(f"Path: {DOCKER_COMPOSE_FILE}\n")
         return
 
+    # Follow audit.log from here on, so AppArmor / Seccomp records are staged as they happen
+    if not start_tailer(STAGED_DIR):
+        print(f"{Fore.YELLOW}WARNING: audit.log tailer not started, records are staged at stop time{Style.RESET_ALL}")
+    else:
+        # sudo credentials are cached now, so the AppArmor profile check can run
+        check_aa_profile(wait=True)
+        print_aa_profile_status()
+
     print(f"{Fore.CYAN}Starting honeypot container...{Style.RESET_ALL}")
     print_separator()
 
@@ -96,6 +107,8 @@ def docker_compose_restart():
     print_header("Restarting Honeypot...")
 
     print("Stopping Honeypot...")
+    # The audit.log follower stops with the container (its cursor stays, staging is kept)
+    stop_tailer(STAGED_DIR)
     subprocess.run(["docker", "compose", "down"], cwd=CONTAINER_DIR)
 
     time.sleep(2)
@@ -104,6 +117,9 @@ def docker_compose_restart():
 
     if result.returncode == 0:
         print(f"\n{Fore.GREEN}SUCCESS: Honeypot restarted{Style.RESET_ALL}")
+        # Same experiment: follow again from the cursor
+        if not start_tailer(STAGED_DIR):
+            print(f"{Fore.YELLOW}WARNING: audit.log tailer not started, records are staged at stop time{Style.RESET_ALL}")
 
 
 def docker_compose_logs():
@@ -0,0 +1,129 @@
+# ============================================================================
+# decode_json.py - Schema-typed decoding of cowrie.json lines
+# Uses orjson or msgspec when installed and falls back to the stdlib json
+#   module. Each eventid has a fixed set of typed fields, values are written
+#   straight into per-eventid column buffers, and lines that do not decode are
+#   counted (frame.attrs["malformed_lines"]) rather than silently dropped.
+#   Fields outside the schema are kept as JSON text in the "extra" column.
+# ============================================================================
+import json
+
+import pandas as pd
+
+from menu.utils_process_data import compact_frame
+
+try:
+    import orjson
+    loads = orjson.loads
+    DECODER = "orjson"
+    DECODE_ERRORS = (ValueError,)
+except ImportError:
+    try:
+        import msgspec
+        loads = msgspec.json.Decoder().decode
+        DECODER = "msgspec"
+        DECODE_ERRORS = (ValueError, msgspec.DecodeError)
+    except ImportError:
+        loads = json.loads
+        DECODER = "json"
+        DECODE_ERRORS = (ValueError,)
+
+# Cowrie writes timestamps as 2026-04-11T14:27:42.289193+0000
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+# Fields every event carries
+COMMON_FIELDS = {
+    "eventid": "str",
+    "timestamp": "time",
+    "session": "str",
+    "src_ip": "str",
+    "sensor": "str",
+    "protocol": "str",
+    "message": "str",
+}
+
+# Extra fields kept per eventid - built from the events seen in results/*/cowrie.json
+# Anything not listed here (kex algorithm lists, client vars...) goes to EXTRA_FIELD
+EVENT_SCHEMAS = {
+    "cowrie.session.connect": {"src_port": "int", "dst_ip": "str", "dst_port": "int"},
+    "cowrie.session.closed": {"duration": "float"},
+    "cowrie.session.params": {"arch": "str"},
+    "cowrie.session.profile": {"profile": "str", "model": "str", "instance": "str"},
+    "cowrie.login.success": {"username": "str", "password": "str"},
+    "cowrie.login.failed": {"username": "str", "password": "str"},
+    "cowrie.command.input": {"input": "str"},
+    "cowrie.command.failed": {"input": "str"},
+    "cowrie.session.file_download": {"url": "str", "shasum": "str", "outfile": "str",
+                                     "destfile": "str", "duplicate": "bool"},
+    "cowrie.session.file_download.failed": {"url": "str"},
+    "cowrie.session.file_upload": {"filename": "str", "shasum": "str", "outfile": "str"},
+    "cowrie.log.closed": {"ttylog": "str", "size": "int", "duration": "float"},
+    "cowrie.client.version": {"version": "str"},
+    "cowrie.client.kex": {"hassh": "str"},
+    "cowrie.client.size": {"width": "int", "height": "int"},
+}
+# Column holding the fields of an event that its schema does not list, as a JSON object
+EXTRA_FIELD = "extra"
+
+
+def _typed_column(values: list, kind: str) -> pd.Series:
+    """Convert a raw column buffer into its schema dtype"""
+    if kind == "str":
+        return pd.Series(values, dtype=object).astype("string")
+    if kind == "float":
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").astype("float64")
+    if kind == "int":
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").astype("Int64")
+    if kind == "bool":
+        return pd.Series(values, dtype=object).map({True: True, False: False}).astype("boolean")
+    try:
+        return pd.to_datetime(pd.Series(values, dtype=object), format=TIMESTAMP_FORMAT, utc=True)
+    except ValueError:
+        return pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", utc=True, errors="coerce")
+
+
+def decode_cowrie_lines(lines: list) -> pd.DataFrame:
+    """Decode raw cowrie.json lines (bytes or str) into a typed dataframe sorted by timestamp,
+    events with the same timestamp staying in file order"""
+    buffers = {}    # eventid -> {column: [values]}
+    positions = {}  # eventid -> [line number of each row]
+    malformed = 0
+    for number, line in enumerate(lines):
+        line = line.strip()
+        if not line: continue
+        try:
+            record = loads(line)
+        except DECODE_ERRORS:
+            malformed += 1
+            continue
+        if not isinstance(record, dict) or "eventid" not in record or "timestamp" not in record:
+            malformed += 1
+            continue
+
+        columns = buffers.get(record["eventid"])
+        if columns is None:
+            schema = EVENT_SCHEMAS.get(record["eventid"], {})
+            columns = buffers[record["eventid"]] = {name: [] for name in [*COMMON_FIELDS, *schema, EXTRA_FIELD]}
+            positions[record["eventid"]] = []
+        extra = None
+        for name in record:
+            if name not in columns:
+                extra = {name: value for name, value in record.items() if name not in columns}
+                break
+        record[EXTRA_FIELD] = json.dumps(extra) if extra else None
+        for name, values in columns.items():
+            values.append(record.get(name))
+        positions[record["eventid"]].append(number)
+
+    frames = []
+    for eventid, columns in buffers.items():
+        schema = {**COMMON_FIELDS, **EVENT_SCHEMAS.get(eventid, {}), EXTRA_FIELD: "str"}
+        frame = pd.DataFrame({name: _typed_column(values, schema[name]) for name, values in columns.items()})
+        frames.append(frame.assign(_line=positions[eventid]))
+    dataframe = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if not dataframe.empty:
+        # The line number breaks timestamp ties, which the per-eventid buffers would reorder
+        dataframe = dataframe.sort_values(["timestamp", "_line"]).drop(columns="_line").reset_index(drop=True)
+    dataframe.attrs["malformed_lines"] = malformed
+    # Categorical eventid/session/src_ip..., downcast integers, no all-NaN columns
+    return compact_frame(dataframe)
@@ -1,8 +1,10 @@
 from pathlib import Path
+import hashlib
 import json
 import re
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib
 matplotlib.use("Agg") # write to file, no GUI
@@ -10,22 +12,71 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
 
+import numpy as np
 import pandas as pd
 from colorama import Fore, Style
 
 from menu.utils import clear_screen, print_header, print_separator, pause
-from menu.utils_process_data import extract_sessions, extract_commands
+from menu.utils_process_data import session_summary, extract_commands, cube_counts
+from menu.cache import file_digest
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Processes that are the payload's own actions, not cowrie starting up
+MALWARE_PROCS = {"bash", "cp"}
+# Per chart: hash of the data it was drawn from and of the plotting code, in charts/
+MANIFEST_NAME = "manifest.json"
+# Above this many command rows the timeline is drawn as commands per time bucket instead
+TIMELINE_MAX_ROWS = 40
+TIMELINE_BINS = 120
+# Command families (first word, e.g. wget / busybox) shown in the binned timeline, the rest are "other"
+TIMELINE_FAMILIES = 8
+# Below this many bars / steps to draw in total, starting worker processes (each imports
+# matplotlib) costs more than rendering the charts serially
+PARALLEL_MIN_ROWS = 2000
+
 
 # ------------------------------ HELPER FUNCS ------------------------------
 
-def _save_figure_to_path(fig, path : Path, filename : str):
-    """Save figures to path and close"""
+def _save_figure_to_path(fig, path : Path, filename : str) -> str:
+    """Save figures to path and close, returns the line to print (charts render in worker processes)"""
     fig.savefig(path / filename, dpi=150, bbox_inches="tight")
     plt.close(fig)
-    print(f"{Fore.GREEN}    Saved: {filename}{Style.RESET_ALL}")
+    return f"{Fore.GREEN}    Saved: {filename}{Style.RESET_ALL}"
+
+def _json_default(value):
+    """Aggregated chart data -> JSON: Series as ordered (label, value) pairs, numpy scalars as numbers"""
+    if isinstance(value, pd.Series):
+        return [[str(label), count] for label, count in zip(value.index, value.tolist())]
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+def _data_digest(data) -> str:
+    """BLAKE2b of a chart's aggregated data in canonical JSON form"""
+    text = json.dumps(data, sort_keys=True, default=_json_default)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+def _code_version() -> str:
+    """This module's source + the matplotlib version: any change to the plotting re-renders every chart"""
+    return f"{file_digest(Path(__file__))}-{matplotlib.__version__}"
+
+def _load_manifest(charts_dir: Path) -> dict:
+    try:
+        return json.loads((charts_dir / MANIFEST_NAME).read_text()).get("charts", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+def _save_manifest(charts_dir: Path, charts: dict):
+    path = charts_dir / MANIFEST_NAME
+    try:
+        path.with_suffix(".tmp").write_text(json.dumps({
+            "charts": charts,
+            "reused": [filename for filename, chart in charts.items() if chart["reused"]],
+        }, indent=2))
+        os.replace(path.with_suffix(".tmp"), path)
+    except OSError:
+        pass
 
 def _shorten_label(cmd:str, max_len: int=25) -> str:
     """Shortens a command string to a readable chart label
@@ -37,14 +88,17 @@ def _shorten_label(cmd:str, max_len: int=25) -> str:
 
 
 # ------------------------------ PHOTO GENERATION ------------------------------
-def chart_session_duration(dir:Path, v_json_df:pd.DataFrame, c_json_df:pd.DataFrame, aa_df:pd.DataFrame):
-    """Create barcharts based on session duration"""
+def _session_duration_data(v_json_df:pd.DataFrame, c_json_df:pd.DataFrame) -> dict:
+    """Average session duration of each honeypot"""
     # Extract session information from both honeypots
-    v_sesh = extract_sessions(v_json_df)
-    c_sesh = extract_sessions(c_json_df)
-    
+    v_sesh = session_summary(v_json_df)
+    c_sesh = session_summary(c_json_df)
+    return {"durations": [float(v_sesh["duration"].mean()), float(c_sesh["duration"].mean())]}
+
+def chart_session_duration(dir:Path, data:dict) -> str:
+    """Create barcharts based on session duration"""
     labels = ["Vanilla", "Containerised"]
-    durations = [v_sesh["duration"].mean(), c_sesh["duration"].mean()]
+    durations = data["durations"]
     colours = ["#89cff0", "#FF474C"] # Baby blue for vanilla, light red for containerised
     # Define sizing & bars
     fig, ax = plt.subplots(figsize=(7, 4))
@@ -60,41 +114,107 @@ def chart_session_duration(dir:Path, v_json_df:pd.DataFrame, c_json_df:pd.DataFr
     ax.set_title("Session Duration: Vanilla vs Containerised")
     ax.set_ylim(0, max(durations) * 1.5)    # Give headroom for labels
     fig.tight_layout()
-    _save_figure_to_path(fig, dir, "01_session_duration.png")
-
-def chart_command_timeline(dir:Path, v_json_df:pd.DataFrame, c_json_df:pd.DataFrame, aa_df:pd.DataFrame):
-    v_cmds = extract_commands(v_json_df)
-    c_cmds = extract_commands(c_json_df)
-
-    if v_cmds.empty and c_cmds.empty:
-        print(f"{Fore.YELLOW}    Skipped: 02_command_timeline.png (no commands){Style.RESET_ALL}")
-        return
-
-    v_sesh = extract_sessions(v_json_df)
-    c_sesh = extract_sessions(c_json_df)
-
-    v_time_zero = v_sesh["connect_time"].min() if not v_sesh.empty else v_cmds["timestamp"].min()
-    c_time_zero = c_sesh["connect_time"].min() if not c_sesh.empty else c_cmds["timestamp"].min()
-
-    # Compute elapsed secondes for each command from session connect
-    # For each command, subtract its elapsed time from session connect
-    v_data = [(elapsed, _shorten_label(row["input"]))
-              for i, row in v_cmds.iterrows()
-              for elapsed in [(row["timestamp"] - v_time_zero).total_seconds()]]
-    c_data = [(elapsed, _shorten_label(row["input"]))
-              for i, row in c_cmds.iterrows()
-              for elapsed in [(row["timestamp"] - c_time_zero).total_seconds()]]
-    # Create labels based off commands
-    labels = [label for i, label in v_data]
-    # If either honeypot has incorrect / different commands, handle the edge case
-    for i, label in c_data:
-        if label not in labels: labels.append(label)
-    # Map each shortened label to its elapsed time
-    v_lookup = {l: elapsed for elapsed, l in v_data}
-    c_lookup = {label: elapsed for elapsed, label in c_data}
-    # Build lists of bar lenngth in the order of labels = []
-    v_times = [v_lookup.get(label, 0) for label in labels]
-    c_times = [c_lookup.get(label, 0) for label in labels]
+    return _save_figure_to_path(fig, dir, "01_session_duration.png")
+
+def _command_elapsed(json_df: pd.DataFrame) -> pd.DataFrame:
+    """command, its occurrence number (nth run of the same command) and seconds since the first connect"""
+    cmds = extract_commands(json_df)
+    sesh = session_summary(json_df)
+    time_zero = sesh["connect_time"].min() if not sesh.empty else cmds["timestamp"].min()
+    elapsed = pd.DataFrame({
+        "command": cmds["input"].astype(str).str.strip().to_numpy(),
+        "elapsed": (cmds["timestamp"] - time_zero).dt.total_seconds().to_numpy(),
+    })
+    elapsed["occurrence"] = elapsed.groupby("command", sort=False).cumcount()
+    return elapsed
+
+def _command_families(commands: pd.Series) -> pd.Series:
+    """Program each command runs: first word without its path (/bin/busybox wget -> busybox)"""
+    return commands.str.extract(r"^(\S*)", expand=False).str.rsplit("/", n=1).str[-1].replace("", "(empty)")
+
+def _command_density_data(v: pd.DataFrame, c: pd.DataFrame) -> dict:
+    """Commands per time bucket per honeypot, split into the top command families + other"""
+    span = np.nanmax(np.concatenate([v["elapsed"].to_numpy(), c["elapsed"].to_numpy(), [0.0]]))
+    edges = np.linspace(0, span or 1, TIMELINE_BINS + 1)
+    v_families, c_families = _command_families(v["command"]), _command_families(c["command"])
+    totals = pd.concat([v_families, c_families]).value_counts()
+    top = totals.index[:TIMELINE_FAMILIES].tolist()
+    families = top + (["other"] if len(totals) > len(top) else [])
+
+    def counts(elapsed: pd.Series, family: pd.Series) -> list:
+        # One bincount over (family, bucket) pairs instead of one histogram per family
+        timed = elapsed.notna().to_numpy()
+        code = pd.Categorical(family.where(family.isin(top), "other"), categories=families).codes
+        code = code[timed].astype(np.int64)
+        bucket = np.clip(np.searchsorted(edges, elapsed.to_numpy()[timed], side="right") - 1, 0, TIMELINE_BINS - 1)
+        matrix = np.bincount(code * TIMELINE_BINS + bucket, minlength=len(families) * TIMELINE_BINS)
+        return matrix.reshape(len(families), TIMELINE_BINS).tolist()
+
+    return {"mode": "binned", "edges": edges.tolist(), "families": families,
+            "totals": [int(totals.get(f, totals.iloc[len(top):].sum())) for f in families],
+            "v_counts": counts(v["elapsed"], v_families), "c_counts": counts(c["elapsed"], c_families),
+            "v_total": len(v), "c_total": len(c)}
+
+def _command_timeline_data(v_json_df:pd.DataFrame, c_json_df:pd.DataFrame) -> dict:
+    """One row per command: its elapsed seconds on each honeypot (0 where it did not run).
+    The nth run of a command on one honeypot is paired with its nth run on the other.
+    Above TIMELINE_MAX_ROWS rows, commands per time bucket instead (_command_density_data)"""
+    v = _command_elapsed(v_json_df)
+    c = _command_elapsed(c_json_df)
+
+    if v.empty and c.empty:
+        return None
+    # There are at least as many rows as commands on either side
+    if max(len(v), len(c)) > TIMELINE_MAX_ROWS:
+        return _command_density_data(v, c)
+
+    # Rows in vanilla order, then commands only the containerised honeypot ran
+    rows = v.assign(v_order=np.arange(len(v))).merge(c.assign(c_order=np.arange(len(c))),
+                                                    on=["command", "occurrence"], how="outer",
+                                                    suffixes=("_v", "_c"))
+    if len(rows) > TIMELINE_MAX_ROWS:
+        return _command_density_data(v, c)
+    rows = rows.sort_values(["v_order", "c_order"], na_position="last", kind="stable")
+    return {"mode": "rows",
+            "labels": [_shorten_label(command) for command in rows["command"]],
+            "v_times": rows["elapsed_v"].fillna(0).tolist(),
+            "c_times": rows["elapsed_c"].fillna(0).tolist()}
+
+def _chart_command_density(dir:Path, data:dict) -> str:
+    """Binned timeline: one panel per honeypot, commands per bucket stacked by family.
+    Fixed figure size and TIMELINE_BINS x families steps, however many commands there are"""
+    edges, families = np.array(data["edges"]), data["families"]
+    colours = [plt.cm.tab10(i % 10) for i in range(len(families))]
+    if families[-1] == "other": colours[-1] = "#BDBDBD"
+    fig, axes = plt.subplots(2, 1, figsize=(13, 7), sharex=True)
+    for ax, counts, total, name, colour in [
+            (axes[0], data["v_counts"], data["v_total"], "Vanilla", "#1565C0"),
+            (axes[1], data["c_counts"], data["c_total"], "Containerised", "#B71C1C")]:
+        baseline = np.zeros(len(edges) - 1)
+        for family_counts, family_colour in zip(counts, colours):
+            top = baseline + np.array(family_counts)
+            ax.stairs(top, edges, baseline=baseline, fill=True, color=family_colour, zorder=3)
+            baseline = top
+        ax.set_title(f"{name}: {total} commands", fontsize=9, color=colour)
+        ax.set_ylabel(f"Commands per {edges[1] - edges[0]:.1f}s")
+        ax.grid(axis="y", linestyle="--", alpha=0.4)
+    # The families named with their command count across both honeypots
+    legend_handles = [mpatches.Patch(color=family_colour, label=f"{family} ({count})")
+                      for family, count, family_colour in zip(families, data["totals"], colours)]
+    axes[0].legend(handles=legend_handles, fontsize=7, loc="upper right", title="Command family",
+                   title_fontsize=7)
+    axes[1].set_xlabel("Seconds since session start")
+    axes[1].set_xlim(edges[0], edges[-1])
+    fig.suptitle("Attack Command Timing: Vanilla vs Containerised")
+    fig.tight_layout()
+    return _save_figure_to_path(fig, dir, "02_command_timeline.png")
+
+def chart_command_timeline(dir:Path, data:dict) -> str:
+    if data is None:
+        return f"{Fore.YELLOW}    Skipped: 02_command_timeline.png (no commands){Style.RESET_ALL}"
+    if data["mode"] == "binned":
+        return _chart_command_density(dir, data)
+    labels, v_times, c_times = data["labels"], data["v_times"], data["c_times"]
     # Number of command rows
     no = len(labels)
     # Integer (y) positions, one per row
@@ -173,21 +293,28 @@ def chart_command_timeline(dir:Path, v_json_df:pd.DataFrame, c_json_df:pd.DataFr
     ax.set_xlim(0, max(max(v_times), max(c_times)) * 1.1)
 
     fig.tight_layout()
-    _save_figure_to_path(fig, dir, "02_command_timeline.png")
-
-def chart_apparmor_overview(dir: Path, aa_df: pd.DataFrame):
+    return _save_figure_to_path(fig, dir, "02_command_timeline.png")
+
+def _apparmor_overview_data(aa_cube: pd.Series) -> dict:
+    """Denial count of every (process, operation), one list over the processes per operation.
+    Summed from the denial cube (utils_process_data.denial_cube), not counted from the rows"""
+    pairs = aa_cube.groupby(level=["comm", "operation"], sort=False).sum()
+    if pairs.empty:
+        return None
+
+    # Get all unique processes and operations present in the data, in first-seen order
+    processes  = pairs.index.get_level_values("comm").unique().tolist()
+    operations = pairs.index.get_level_values("operation").unique().tolist()
+    table = pairs.unstack("operation", fill_value=0).reindex(index=processes, columns=operations, fill_value=0)
+    counts = {o: table[o].astype(int).tolist() for o in operations}
+    return {"processes": processes, "operations": operations, "counts": counts}
+
+def chart_apparmor_overview(dir: Path, data: dict) -> str:
     """Stacked horizontal bar chart, one bar per process stacked by operation
     Color coding separates cowrie startup noise (grey) vs malware actions (red)"""
-    if aa_df.empty or "comm" not in aa_df.columns:
-        print(f"    skipped: 03_apparmor_overview.png (no AppArmor data)")
-        return
-
-    # Define which processes are malware vs startup noise
-    MALWARE_PROCS = {"bash", "cp"}
-
-    # Get all unique processes and operations present in the data
-    processes  = aa_df["comm"].unique().tolist()
-    operations = aa_df["operation"].unique().tolist()
+    if data is None:
+        return f"    skipped: 03_apparmor_overview.png (no AppArmor data)"
+    processes, operations = data["processes"], data["operations"]
     # Colour each bar on operation
     OP_COLOURS = {
         # Two grey shared for cowrie & twistd (python) noise
@@ -204,13 +331,8 @@ def chart_apparmor_overview(dir: Path, aa_df: pd.DataFrame):
     # track left edge for each stacked segmnet per process
     left_bars = {process: 0 for process in processes}
     for o in operations:
-        counts = []
-        colours = []
-        for p in processes:
-            # Count denials matching this process + oepration
-            count = len(aa_df[(aa_df["comm"] == p) & (aa_df["operation"] == o)])
-            counts.append(count)
-            colours.append(OP_COLOURS.get((p, o), "#757575"))
+        counts = data["counts"][o]
+        colours = [OP_COLOURS.get((p, o), "#757575") for p in processes]
          # Draw x-axis bars, 1 per process
         bars = ax.barh(processes, counts, 
                        left=[left_bars[p] for p in processes],
@@ -251,29 +373,31 @@ def chart_apparmor_overview(dir: Path, aa_df: pd.DataFrame):
     ax.legend(handles=legend_handles, fontsize=8, loc="lower right")
     ax.grid(axis="x", linestyle="--", alpha=0.4)
     fig.tight_layout()
-    _save_figure_to_path(fig, dir, "03_apparmor_overview.png")
-
-def chart_apparmor_blocked_paths(dir: Path, aa_df : pd.DataFrame):
+    return _save_figure_to_path(fig, dir, "03_apparmor_overview.png")
+
+def _apparmor_blocked_paths_data(aa_cube : pd.Series):
+    """Denials per file path of the malware processes, or the reason the chart is skipped"""
+    comm = aa_cube.index.get_level_values("comm")
+    if not comm.notna().any():
+        return "no AppArmor data"
+    # Filter the cube to only malware denials
+    malware = aa_cube[comm.isin(MALWARE_PROCS)]
+    if malware.empty:
+        return "no denials data"
+    path_counts = cube_counts(malware, "name")
+    if path_counts.empty:
+        return "no path data"
+    return path_counts
+
+def chart_apparmor_blocked_paths(dir: Path, path_counts) -> str:
     """
     Charts malware-relevant denials 
     broken down to the exact file path
     
     This shows exactly what AppArmor blocks and which persistence mechanisms
     """
-    if aa_df.empty or "comm" not in aa_df.columns:
-        print(f"    skipped: 04_apparmor_blocked_paths.png (no AppArmor data)")
-        return
-    # processes
-    MALWARE_PROCS = {"bash", "cp"}
-    # Filter to only malware denials
-    # Copy the process from aa_df if in aa_df and of type comm
-    malware_df = aa_df[aa_df["comm"].isin(MALWARE_PROCS).copy()]
-    if malware_df.empty:
-        print(f"    skipped: 04_apparmor_blocked_paths.png (no denials data)")
-    if"name" not in malware_df.columns:
-        print(f"    skipped: 04_apparmor_blocked_paths.png (no path data)")
-
-    path_counts = malware_df["name"].value_counts()
+    if isinstance(path_counts, str):
+        return f"    skipped: 04_apparmor_blocked_paths.png ({path_counts})"
 
     # assign colour per path
     PATH_COLOURS = {
@@ -303,19 +427,76 @@ def chart_apparmor_blocked_paths(dir: Path, aa_df : pd.DataFrame):
     ]
     ax.legend(handles=legend_handles, fontsize=8, loc="lower right")
     fig.tight_layout()
-    _save_figure_to_path(fig, dir, "04_apparmor_blocked_paths.png")
+    return _save_figure_to_path(fig, dir, "04_apparmor_blocked_paths.png")
 
 
 # ------------------------------ MAIN FUNC TO GENERATE CHARTS ------------------------------
-def generate_charts(dir: Path, v_json_df: pd.DataFrame, c_json_df: pd.DataFrame, aa_df : pd.DataFrame):
+def _render_chart(job: tuple) -> str:
+    """Worker: draw and save one chart from its pre-aggregated data"""
+    filename, chart, charts_dir, data = job
+    return chart(charts_dir, data)
+
+def _chart_rows(data) -> int:
+    """Bars / steps one chart draws from its data, to decide whether rendering is worth a pool"""
+    if isinstance(data, pd.Series):
+        return len(data)
+    if "labels" in data:
+        return 2 * len(data["labels"])
+    if "families" in data:
+        return 2 * TIMELINE_BINS * len(data["families"])
+    if "processes" in data:
+        return len(data["processes"]) * len(data["operations"])
+    return len(data.get("durations", ()))
+
+def generate_charts(dir: Path, v_json_df: pd.DataFrame, c_json_df: pd.DataFrame, aa_cube : pd.Series,
+                    parallel: bool = True):
     """Entry point called from process_data.py
-    Creates charts/ subdir in results/ and generates all PNG charts"""
+    Creates charts/ subdir in results/ and generates all PNG charts
+    aa_cube is the AppArmor denial cube (utils_process_data.denial_cube), empty without denials
+    The frames are reduced to each chart's data here, only that small data goes to the
+    worker processes that render (savefig is the slow part), one chart per worker,
+    only when the charts draw at least PARALLEL_MIN_ROWS bars / steps between them.
+    A chart whose data and plotting code hash the same as in charts/manifest.json, and
+    whose PNG is still there, is reused instead of drawn again. A skipped chart's PNG is removed.
+    parallel=False when already inside a worker process (batch analysis)"""
     charts_dir = dir / "charts"
     charts_dir.mkdir(exist_ok=True) # Create directory called charts
     
     print(f"{Fore.GREEN}   Visualising analysis...{Style.RESET_ALL}")
-    # Call relevant functions to generate charts
-    chart_session_duration(charts_dir, v_json_df, c_json_df, aa_df) #01
-    chart_command_timeline(charts_dir, v_json_df, c_json_df, aa_df) #02
-    chart_apparmor_overview(charts_dir, aa_df)
-    chart_apparmor_blocked_paths(charts_dir, aa_df)
+    charts = [
+        ("01_session_duration.png", chart_session_duration, charts_dir, _session_duration_data(v_json_df, c_json_df)),
+        ("02_command_timeline.png", chart_command_timeline, charts_dir, _command_timeline_data(v_json_df, c_json_df)),
+        ("03_apparmor_overview.png", chart_apparmor_overview, charts_dir, _apparmor_overview_data(aa_cube)),
+        ("04_apparmor_blocked_paths.png", chart_apparmor_blocked_paths, charts_dir,
+         _apparmor_blocked_paths_data(aa_cube)),
+    ]
+    code = _code_version()
+    previous = _load_manifest(charts_dir)
+    manifest, lines, jobs = {}, {}, []
+    for job in charts:
+        filename, data = job[0], job[3]
+        if data is None or isinstance(data, str):
+            # Skipped (no data, or the reason why): no manifest entry, and no image from an earlier run
+            (charts_dir / filename).unlink(missing_ok=True)
+            lines[filename] = _render_chart(job)
+            continue
+        entry = {"inputs": _data_digest(data), "code": code, "reused": False}
+        before = previous.get(filename, {})
+        if (before.get("inputs") == entry["inputs"] and before.get("code") == code
+                and (charts_dir / filename).exists()):
+            entry["reused"] = True
+            lines[filename] = f"{Fore.CYAN}    Reused: {filename} (unchanged){Style.RESET_ALL}"
+        else:
+            jobs.append(job)
+        manifest[filename] = entry
+
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if parallel and workers > 1 and sum(_chart_rows(job[3]) for job in jobs) >= PARALLEL_MIN_ROWS:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            lines.update(zip((job[0] for job in jobs), pool.map(_render_chart, jobs)))
+    else:
+        lines.update((job[0], _render_chart(job)) for job in jobs)
+    _save_manifest(charts_dir, manifest)
+    # Printed in chart order once all are saved, whichever worker finished first
+    for job in charts:
+        print(lines[job[0]])
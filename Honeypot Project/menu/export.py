@@ -19,6 +19,8 @@ from menu.utils import (
     clear_screen, print_header, print_separator, pause,
     is_container_running
 )
+from menu.logset import find_log_set
+from menu.audit_tail import stop_tailer
  
  
 def export_logs():
@@ -35,6 +37,13 @@ def export_logs():
         pause()
         return
 
+    export_experiment(experiment_name)
+    pause()
+
+
+def export_experiment(experiment_name: str) -> dict:
+    """Export both honeypots' logs into results/<name>_<timestamp>/ and clear the live data.
+    Non-interactive core of [E], also used by the command line interface"""
     if " " in experiment_name:
         experiment_name = experiment_name.replace(" ", "-")
         print(f"{Fore.YELLOW}Spaces replaced with dashes: {experiment_name}{Style.RESET_ALL}\n")
@@ -79,21 +88,20 @@ def export_logs():
     print(f"\n{Fore.CYAN}Exporting vanilla honeypot...{Style.RESET_ALL}")
     vanilla_count = 0
 
-    if VANILLA_LOG_FILE.exists():
-        shutil.copy2(VANILLA_LOG_FILE, vanilla_export_dir / "cowrie.log")
-        size = VANILLA_LOG_FILE.stat().st_size
-        print(f"{Fore.GREEN}    cowrie.log  ({size:,} bytes){Style.RESET_ALL}")
-        vanilla_count += 1
-    else:
-        print(f"{Fore.YELLOW}    cowrie.log not found — was Cowrie running?{Style.RESET_ALL}")
-
-    if VANILLA_JSON_LOG_FILE.exists():
-        shutil.copy2(VANILLA_JSON_LOG_FILE, vanilla_export_dir / "cowrie.json")
-        size = VANILLA_JSON_LOG_FILE.stat().st_size
-        print(f"{Fore.GREEN}    cowrie.json ({size:,} bytes){Style.RESET_ALL}")
-        vanilla_count += 1
-    else:
-        print(f"{Fore.YELLOW}    cowrie.json not found — was Cowrie running?{Style.RESET_ALL}")
+    # logtype=rotating leaves cowrie.json.YYYY-MM-DD[.gz] etc. beside the live log - export the whole set
+    exported_rotations = []
+    for live_log in [VANILLA_LOG_FILE, VANILLA_JSON_LOG_FILE]:
+        members = find_log_set(live_log)
+        if not members:
+            print(f"{Fore.YELLOW}    {live_log.name} not found — was Cowrie running?{Style.RESET_ALL}")
+            continue
+        for member in members:
+            shutil.copy2(member, vanilla_export_dir / member.name)
+            size = member.stat().st_size
+            print(f"{Fore.GREEN}    {member.name:<11} ({size:,} bytes){Style.RESET_ALL}")
+            vanilla_count += 1
+            if member != live_log:
+                exported_rotations.append(member)
 
     vanilla_dl_export = vanilla_export_dir / "downloads"
     vanilla_dl_export.mkdir(exist_ok=True)
@@ -123,12 +131,12 @@ def export_logs():
         print(f"{Fore.YELLOW}Stop container manually to stage logs{Style.RESET_ALL}")
     else:
         for fname in ["cowrie.log", "cowrie.json"]:
-            source = STAGED_DIR / fname
-            if source.exists() and source.stat().st_size > 0:
-                shutil.copy2(source, containerised_export_dir / fname)
-                print(f"{Fore.GREEN}{fname} ({source.stat().st_size:}, bytes){Style.RESET_ALL}")
+            members = [m for m in find_log_set(STAGED_DIR / fname) if m.stat().st_size > 0]
+            for source in members:
+                shutil.copy2(source, containerised_export_dir / source.name)
+                print(f"{Fore.GREEN}{source.name} ({source.stat().st_size:}, bytes){Style.RESET_ALL}")
                 container_count +=1
-            else:
+            if not members:
                 print(f"{Fore.YELLOW}WARNING: {fname} not in staging{Style.RESET_ALL}")
 
         staged_download = STAGED_DIR / "downloads"
@@ -154,7 +162,11 @@ def export_logs():
             else:
                 print(f"{Fore.YELLOW} {filename} not in staging{Style.RESET_ALL}")
     # CLEAR STAGING DIRECTORY
-    if STAGED_DIR.exists():
+    # The audit.log follower goes first (export may run without [3] stop), or its next pass
+    #   would recreate staging for the next experiment
+    if not stop_tailer(STAGED_DIR):
+        print(f"{Fore.RED}audit.log tailer did not stop, staging area kept {Style.RESET_ALL}{(STAGED_DIR)}")
+    elif STAGED_DIR.exists():
         shutil.rmtree(STAGED_DIR)
         print(f"{Fore.GREEN} Staging area cleared {Style.RESET_ALL}{(STAGED_DIR)}")
 
@@ -166,6 +178,10 @@ def export_logs():
         if log_file.exists():
             log_file.write_text("")
             print(f"{Fore.GREEN}    Cleared vanilla/{log_file.name}{Style.RESET_ALL}")
+    # Rotations were copied whole into the export, so they must not leak into the next experiment
+    for rotation in exported_rotations:
+        rotation.unlink()
+        print(f"{Fore.GREEN}    Cleared vanilla/{rotation.name}{Style.RESET_ALL}")
 
     if VANILLA_DOWNLOADS_DIR.exists():
         dl_files = list(VANILLA_DOWNLOADS_DIR.glob("*"))
@@ -215,4 +231,9 @@ def export_logs():
     print(f"  {Fore.CYAN}Location     :{Style.RESET_ALL} {export_dir}")
     print(f"  {Fore.CYAN}Vanilla      :{Style.RESET_ALL} {vanilla_count} item(s) exported")
     print(f"  {Fore.CYAN}Containerised:{Style.RESET_ALL} {container_count} item(s) exported")
-    pause()
+    return {
+        "experiment": experiment_name,
+        "export_dir": str(export_dir),
+        "vanilla_items": vanilla_count,
+        "containerised_items": container_count,
+    }
@@ -0,0 +1,121 @@
+# ============================================================================
+# ingest.py - Offset-checkpointed incremental ingestion of JSON-lines logs
+# cowrie.json is append-only while a sensor is running. Instead of decoding
+#   the whole file on every [A] run, remember the inode and byte offset we
+#   reached last time, decode only the lines appended since and merge them
+#   into the frame saved by the previous run.
+# The saved frame is Feather (data only - results/ is shared and copied around,
+#   so nothing in it is unpickled). Without pyarrow there is no checkpoint.
+# ============================================================================
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from menu.cache import CACHE_VERSION, feather
+from menu.utils_process_data import concat_frames
+
+# Bytes hashed from the start of the log. cowrie.json is truncated in place by
+#   [E] export (same inode), so the inode alone cannot tell us it was rewritten
+HEAD_BYTES = 4096
+
+
+def _checkpoint_paths(path: Path) -> tuple:
+    """Checkpoint metadata + saved frame live next to the log as hidden files"""
+    return (path.parent / f".{path.name}.checkpoint.json",
+            path.parent / f".{path.name}.checkpoint.feather")
+
+
+def _head_digest(path: Path, length: int) -> str:
+    """SHA-1 of the first min(length, HEAD_BYTES) bytes of the log"""
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read(min(length, HEAD_BYTES))).hexdigest()
+
+
+def _load_checkpoint(path: Path, stat: os.stat_result):
+    """Return (offset, frame) if the saved checkpoint still describes this file, else None"""
+    meta_path, frame_path = _checkpoint_paths(path)
+    if feather is None or not meta_path.exists() or not frame_path.exists(): return None
+    try:
+        meta = json.loads(meta_path.read_text())
+        # Rotated / replaced log, or truncated below what we already read
+        # Saved by an older decoder, whose frame no longer matches the current schema
+        if meta.get("version") != CACHE_VERSION: return None
+        if meta["inode"] != stat.st_ino or meta["offset"] > stat.st_size: return None
+        if meta["head"] != _head_digest(path, meta["offset"]): return None
+        frame = pd.read_feather(frame_path)
+    except Exception:
+        # Truncated / corrupt frame, one from another pyarrow, a bad entry: decode from the start
+        return None
+    # Feather does not keep attrs (e.g. malformed_lines) so they ride in the metadata
+    frame.attrs.update(meta.get("attrs", {}))
+    return meta["offset"], frame
+
+
+def _save_checkpoint(path: Path, stat: os.stat_result, offset: int, frame: pd.DataFrame):
+    """Write frame then metadata via temp files so a crash never leaves a half checkpoint"""
+    if feather is None: return
+    meta_path, frame_path = _checkpoint_paths(path)
+    meta = {"version": CACHE_VERSION, "inode": stat.st_ino, "offset": offset, "head": _head_digest(path, offset),
+            "attrs": frame.attrs}
+    try:
+        frame.reset_index(drop=True).to_feather(frame_path.with_suffix(".tmp"))
+        os.replace(frame_path.with_suffix(".tmp"), frame_path)
+        meta_path.with_suffix(".tmp").write_text(json.dumps(meta))
+        os.replace(meta_path.with_suffix(".tmp"), meta_path)
+    except Exception:
+        # Read-only results/, or columns Arrow cannot store - ingestion still worked, the
+        #   previous checkpoint (if any) is still a consistent pair and we re-read from it
+        pass
+
+
+def _complete_lines(chunk: bytes) -> tuple:
+    """Split appended bytes into whole lines + number of bytes consumed.
+    A trailing line without newline is only taken if it already decodes, otherwise
+    cowrie is still mid-write and it is left for the next run"""
+    end = chunk.rfind(b"\n") + 1
+    lines = chunk[:end].splitlines()
+    tail = chunk[end:]
+    if tail.strip():
+        try:
+            json.loads(tail)
+            lines.append(tail)
+            end = len(chunk)
+        except ValueError:
+            pass
+    return lines, end
+
+
+def ingest_json_lines(path: Path, decode_lines, sort_column: str = "timestamp") -> pd.DataFrame:
+    """Incrementally parse a JSON-lines log.
+    decode_lines(list[bytes]) -> DataFrame turns raw lines into rows.
+    First run decodes everything; later runs only decode bytes appended since the checkpoint"""
+    if not path.exists() or path.stat().st_size == 0: return pd.DataFrame()
+    stat = path.stat()
+
+    checkpoint = _load_checkpoint(path, stat)
+    offset, base = checkpoint if checkpoint else (0, pd.DataFrame())
+    if offset == stat.st_size: return base
+
+    with open(path, "rb") as file:
+        file.seek(offset)
+        lines, consumed = _complete_lines(file.read(stat.st_size - offset))
+    new_rows = decode_lines(lines)
+
+    if base.empty:
+        merged = new_rows
+    elif new_rows.empty:
+        merged = base
+    else:
+        merged = concat_frames([base, new_rows])
+        # Appended lines are nearly always newer - only re-sort when they interleave
+        if new_rows[sort_column].min() < base[sort_column].max():
+            merged = merged.sort_values(sort_column, kind="stable").reset_index(drop=True)
+
+    # Counters the decoder leaves in attrs (e.g. malformed_lines) accumulate across runs
+    merged.attrs = {**new_rows.attrs, **{key: value + new_rows.attrs.get(key, 0)
+                                         for key, value in base.attrs.items() if isinstance(value, int)}}
+    _save_checkpoint(path, stat, offset + consumed, merged)
+    return merged
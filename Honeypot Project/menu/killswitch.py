@@ -9,7 +9,8 @@ import time
  
 from colorama import Fore, Style
  
-from menu.config import CONTAINER_NAME, VANILLA_PID_FILE, KILLSWITCH_LOG
+from menu.config import CONTAINER_NAME, VANILLA_PID_FILE, KILLSWITCH_LOG, STAGED_DIR
+from menu.audit_tail import stop_tailer
 from menu.utils import clear_screen, print_header, pause
 
 
@@ -116,12 +117,20 @@ def display_killswitch_menu():
         pause()
         return
 
+    activate_killswitch()
+    pause()
+
+
+def activate_killswitch(source: str = "main_menu_for_honeypots.py") -> dict:
+    """Run all four killswitch steps without confirmation, returns what each step did.
+    source is written to the killswitch log as where it was activated from"""
     print()
     print(f"{Fore.RED}ACTIVATING KILL SWITCH...{Style.RESET_ALL}")
     print()
 
     print(f"{Fore.CYAN}(1) BLOCKING ALL NETWORK TRAFFIC VIA nftables...{Style.RESET_ALL}")
-    if killswitch_block_network():
+    network_blocked = killswitch_block_network()
+    if network_blocked:
         print(f"{Fore.GREEN}    Network blocked at kernel level{Style.RESET_ALL}")
     else:
         print(f"{Fore.RED}    UNABLE TO BLOCK NETWORK{Style.RESET_ALL}")
@@ -135,6 +144,10 @@ def display_killswitch_menu():
         print(f"{Fore.YELLOW}    Docker container was not running{Style.RESET_ALL}")
     else:
         print(f"{Fore.RED}    FAILED TO STOP DOCKER CONTAINER{Style.RESET_ALL}")
+    # Its audit.log follower too, so it does not outlive the container
+    tailer_stopped = stop_tailer(STAGED_DIR)
+    if not tailer_stopped:
+        print(f"{Fore.RED}    FAILED TO STOP audit.log TAILER{Style.RESET_ALL}")
     print()
 
     print(f"{Fore.CYAN}(3) STOPPING VANILLA COWRIE...{Style.RESET_ALL}")
@@ -152,23 +165,37 @@ def display_killswitch_menu():
     try:
         with open(KILLSWITCH_LOG, 'a') as f:
             f.write(f"[{timestamp}] KILL SWITCH ACTIVATED\n")
-            f.write(f"[{timestamp}] Activated from: main_menu_for_honeypots.py\n")
+            f.write(f"[{timestamp}] Activated from: {source}\n")
+        logged = True
     except PermissionError:
-        pass
+        logged = False
     print()
 
     print(f"{Fore.RED}{'='*60}{Style.RESET_ALL}")
     print(f"{Fore.GREEN}{'KILL SWITCH COMPLETE':^60}{Style.RESET_ALL}")
     print(f"{Fore.GREEN}{'TO REINSTATE: select [R] from main menu':^60}{Style.RESET_ALL}")
     print(f"{Fore.RED}{'='*60}{Style.RESET_ALL}")
-    pause()
+    return {
+        "network_blocked": network_blocked,
+        "docker_stopped": docker_result,
+        "tailer_stopped": tailer_stopped,
+        "cowrie_stopped": success,
+        "cowrie_detail": detail,
+        "logged": logged,
+    }
+
+
+def restore_network() -> dict:
+    """Flush the killswitch nftables rules and restart Docker, returns each command's exit code"""
+    flush = subprocess.run(["sudo", "nft", "flush", "ruleset"])
+    docker = subprocess.run(["sudo", "systemctl", "restart", "docker"])
+    print(f"{Fore.GREEN}Network restored. Docker restored.{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}You may now restart the honeypots{Style.RESET_ALL}")
+    return {"nft_flush": flush.returncode, "docker_restart": docker.returncode}
 
 
 def killswitch_restore():
     clear_screen()
     print_header("Restoring Docker & nftables")
-    subprocess.run(["sudo", "nft", "flush", "ruleset"])
-    subprocess.run(["sudo", "systemctl", "restart", "docker"])
-    print(f"{Fore.GREEN}Network restored. Docker restored.{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}You may now restart the honeypots{Style.RESET_ALL}")
+    restore_network()
     pause()
@@ -0,0 +1,119 @@
+# ============================================================================
+# latency.py - Per-command sandbox latency overhead
+# A command's response latency is the time from its input to the next event
+#   of the same session (the next command, a download result, the close).
+#   Commands both honeypots ran (equal / moved in the alignment) are joined
+#   back to their latencies with merge_asof, and the containerised minus
+#   vanilla difference is the overhead of the sandbox for that command.
+# AppArmor denials logged while a containerised command was running are
+#   counted against it, to show how much of the overhead comes with denials.
+# ============================================================================
+import numpy as np
+import pandas as pd
+
+from menu.align import session_offsets
+from menu.utils_process_data import extract_commands, partition_index, session_summary
+
+LATENCY_COLUMNS = ["session", "command", "offset", "start", "latency"]
+DELTA_COLUMNS = ["pair", "command", "vanilla_latency", "containerised_latency", "delta", "denials"]
+PERCENTILES = [50, 95, 99]
+# Offsets come from the same timestamps on both sides of the join, this only absorbs float noise
+OFFSET_TOLERANCE = 1e-6
+
+
+def _epoch_seconds(timestamps: pd.Series) -> np.ndarray:
+    return (timestamps - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+
+
+def command_latencies(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per command: session, command, seconds since connect, start (epoch seconds)
+    and latency, the seconds until the session's next event (NaN for a session's last event)"""
+    positions = partition_index(df).get("cowrie.command.input")
+    if positions is None or "session" not in df.columns:
+        return pd.DataFrame(columns=LATENCY_COLUMNS)
+
+    # Sort every event by (session, time) once; each event's successor is the next row if same session
+    session, _ = pd.factorize(df["session"])
+    seconds = _epoch_seconds(df["timestamp"])
+    order = np.lexsort((seconds, session))
+    following = np.full(len(df), np.nan)
+    same = session[order][1:] == session[order][:-1]
+    following[order[:-1]] = np.where(same, seconds[order][1:], np.nan)
+
+    commands = extract_commands(df)
+    return pd.DataFrame({
+        "session": commands["session"].astype(str).to_numpy(),
+        "command": commands["input"].astype(str).to_numpy(),
+        "offset": session_offsets(commands, session_summary(df)),
+        "start": seconds[positions],
+        "latency": following[positions] - seconds[positions],
+    })
+
+
+def _attach(matched: pd.DataFrame, latencies: pd.DataFrame, side: str) -> pd.DataFrame:
+    """Look up each matched command's latency on one side by (session, command) at its offset"""
+    left = matched.rename(columns={f"{side}_session": "session", f"{side}_time": "offset"})
+    left["session"] = left["session"].astype(str)
+    joined = pd.merge_asof(left.sort_values("offset", kind="stable"),
+                           latencies.sort_values("offset", kind="stable"),
+                           on="offset", by=["session", "command"],
+                           direction="nearest", tolerance=OFFSET_TOLERANCE)
+    return joined.rename(columns={"session": f"{side}_session", "offset": f"{side}_time",
+                                  "start": f"{side}_start", "latency": f"{side}_latency"})
+
+
+def latency_deltas(alignment: pd.DataFrame, v_df: pd.DataFrame, c_df: pd.DataFrame,
+                   aa_denials: pd.DataFrame) -> pd.DataFrame:
+    """Per command both honeypots ran: each side's latency, containerised - vanilla delta,
+    and the number of AppArmor denials inside the containerised command's window"""
+    if alignment is None or alignment.empty:
+        return pd.DataFrame(columns=DELTA_COLUMNS)
+    matched = alignment.loc[alignment["op"].isin(["equal", "moved"]),
+                            ["pair", "vanilla_session", "containerised_session", "command",
+                             "vanilla_time", "containerised_time"]]
+    if matched.empty:
+        return pd.DataFrame(columns=DELTA_COLUMNS)
+    matched = matched.reset_index(names="row")
+    joined = _attach(matched, command_latencies(v_df), "vanilla")
+    joined = _attach(joined, command_latencies(c_df), "containerised").sort_values("row", kind="stable")
+
+    # Denials in [start, start + latency) of the containerised command, two binary searches per command
+    if aa_denials.empty or "timestamp" not in aa_denials.columns:
+        denials = np.zeros(len(joined), dtype=np.int64)
+    else:
+        denied_at = np.sort(_epoch_seconds(aa_denials["timestamp"].dropna()))
+        start = joined["containerised_start"].to_numpy()
+        end = start + joined["containerised_latency"].to_numpy()
+        denials = np.searchsorted(denied_at, end, side="left") - np.searchsorted(denied_at, start, side="left")
+        denials = np.where(np.isnan(end), 0, denials)
+
+    return pd.DataFrame({
+        "pair": joined["pair"].to_numpy(),
+        "command": joined["command"].to_numpy(),
+        "vanilla_latency": joined["vanilla_latency"].to_numpy(),
+        "containerised_latency": joined["containerised_latency"].to_numpy(),
+        "delta": (joined["containerised_latency"] - joined["vanilla_latency"]).to_numpy(),
+        "denials": denials,
+    })
+
+
+def latency_summary(deltas: pd.DataFrame) -> dict:
+    """Distribution of the per-command overhead, and how much of it falls in windows with denials"""
+    delta = deltas["delta"].to_numpy(dtype=float)
+    measured = ~np.isnan(delta)
+    delta, denied = delta[measured], deltas["denials"].to_numpy()[measured] > 0
+    summary = {"commands": len(deltas), "measured": int(measured.sum()),
+               **{f"p{p}": np.nan for p in PERCENTILES},
+               "mean": np.nan, "total": 0.0, "with_denials": int(denied.sum()),
+               "mean_with_denials": np.nan, "mean_without_denials": np.nan, "denial_share": np.nan}
+    if not len(delta): return summary
+
+    summary.update(zip((f"p{p}" for p in PERCENTILES), np.percentile(delta, PERCENTILES).tolist()))
+    summary["mean"] = float(delta.mean())
+    summary["total"] = float(delta.sum())
+    if denied.any(): summary["mean_with_denials"] = float(delta[denied].mean())
+    if (~denied).any(): summary["mean_without_denials"] = float(delta[~denied].mean())
+    # Share of the added time (positive deltas only) spent in commands that hit denials
+    added = np.clip(delta, 0, None)
+    if denied.any() and added.sum() > 0: summary["denial_share"] = float(added[denied].sum() / added.sum())
+    return summary
@@ -0,0 +1,203 @@
+# ============================================================================
+# logjoin.py - Event-level streaming join of cowrie.json against cowrie.log
+# Both logs are written in time order from the same log events, so they are
+#   merged like two sorted lists on (timestamp, session) in one pass. Only
+#   unmatched events from the last MATCH_WINDOW seconds are held in memory,
+#   and every event found on one side but not the other is reported.
+# cowrie.log has no session column: lines carry a twisted context such as
+#   [HoneyPotSSHTransport,0,127.0.0.1]. The "New connection ... [session: X]"
+#   line binds the next transport seen from that IP to session X.
+# The analysis joins the frames it has already parsed (join_frames), the
+#   chunked path, which holds no frames, streams the files (join_logs).
+# ============================================================================
+import heapq
+import re
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from menu.decode_json import loads, DECODE_ERRORS
+from menu.logset import iter_log_lines
+
+# Missing events kept per side for the report - the counts are always exact
+MISSING_KEPT = 1000
+# Seconds either side an event may be logged at. Most pairs share the exact timestamp, but
+#   download results reach cowrie.log from the HTTP client a little later and without a session
+MATCH_WINDOW = 1.0
+# 2026-03-25T17:02:13.980952+0000 [HoneyPotSSHTransport,0,127.0.0.1] CMD: ...
+#   contexts may contain spaces ([SSHChannel session (0) on ... HoneyPotSSHTransport,0,127.0.0.1])
+#   and some lines use the bare session id instead of a bracketed context
+LOG_LINE = re.compile(r"^(?P<timestamp>\d{4}-\d\d-\d\dT\S+) (?P<rest>.*)$")
+LOG_CONTEXT = re.compile(r"^(?:\[(?P<context>[^\]]*)\]|(?P<bare>\S+)) ?(?P<message>.*)$")
+TRANSPORT = re.compile(r"HoneyPotSSHTransport,(?P<number>\d+),(?P<ip>[^,\]]+)")
+NEW_CONNECTION = re.compile(r"^New connection: (?P<ip>.+):\d+ \(.*\) \[session: (?P<session>\w+)\]")
+SESSION_ID = re.compile(r"^[0-9a-f]{12}$")
+# Text log messages that Cowrie also writes as a cowrie.json event
+LOG_EVENT_PREFIXES = {
+    "New connection: ": "cowrie.session.connect",
+    "Remote SSH version: ": "cowrie.client.version",
+    "SSH client hassh fingerprint: ": "cowrie.client.kex",
+    "login attempt ": "cowrie.login",
+    "Assigned device profile: ": "cowrie.session.profile",
+    "Terminal Size: ": "cowrie.client.size",
+    "request_env: ": "cowrie.client.var",
+    "CMD: ": "cowrie.command.input",
+    "Command not found: ": "cowrie.command.failed",
+    "Saved redir contents": "cowrie.session.file_download",
+    "Downloaded URL": "cowrie.session.file_download",
+    "Attempt to download file": "cowrie.session.file_download.failed",
+    "Closing TTY Log: ": "cowrie.log.closed",
+    "Connection lost after ": "cowrie.session.closed",
+}
+_PREFIXES = tuple(LOG_EVENT_PREFIXES)
+
+
+def iter_json_events(path: Path):
+    """Yield (timestamp, session, eventid) for every cowrie.json event that has log text.
+    Events with an empty message (cowrie.session.params) never reach cowrie.log"""
+    for line in iter_log_lines(path):
+        try:
+            record = loads(line)
+        except DECODE_ERRORS:
+            continue
+        if not isinstance(record, dict) or not record.get("message") or "timestamp" not in record: continue
+        yield record["timestamp"], record.get("session"), record.get("eventid", "")
+
+
+def frame_json_events(json_df: pd.DataFrame):
+    """iter_json_events from parse_cowrie_json's frame"""
+    if json_df.empty or "message" not in json_df.columns: return iter(())
+    message = json_df["message"].astype(object)
+    # cowrie.session.params logs message: [], which the decoder keeps as the text "[]"
+    events = json_df[message.notna() & ~message.isin(["", "[]"]) & json_df["timestamp"].notna()]
+    session = events["session"].astype(object) if "session" in events.columns else pd.Series(None, index=events.index)
+    return zip(_datetimes(events["timestamp"]), session.where(session.notna(), None).tolist(),
+               events["eventid"].astype(str).tolist())
+
+
+def iter_log_events(path: Path):
+    """Yield (timestamp, session, eventid) for every cowrie.log line that records an event"""
+    lines = (LOG_LINE.match(raw.decode(errors="replace").rstrip("\r\n")) for raw in iter_log_lines(path))
+    # Unmatched lines are tracebacks / continuations
+    return _log_events((match["timestamp"], match["rest"]) for match in lines if match)
+
+
+def frame_log_events(log_df: pd.DataFrame):
+    """iter_log_events from parse_cowrie_log's frame - its session column is the first word
+    after the timestamp, so session + message is the rest of the line"""
+    if log_df.empty: return iter(())
+    rest = (log_df["session"].astype(str) + " " + log_df["message"].astype(str)).tolist()
+    return _log_events(zip(_datetimes(log_df["timestamp"]), rest))
+
+
+def _datetimes(timestamps: pd.Series):
+    # Plain datetimes: iterating the Series boxes a Timestamp per row, several times slower
+    return timestamps.array.to_pydatetime()
+
+
+def _log_events(lines):
+    """(timestamp, rest of the line) pairs -> (timestamp, session, eventid) of event lines"""
+    transports = {}     # (transport number, ip) -> session
+    pending = {}        # ip -> sessions whose transport has not logged yet
+    for timestamp, rest in lines:
+        match = LOG_CONTEXT.match(rest)
+        if not match: continue
+        message = match["message"]
+        context = match["context"]
+
+        if context is None:
+            session = match["bare"] if SESSION_ID.match(match["bare"]) else None
+        elif context == "-" and message.startswith("CowrieSSHFactory starting on"):
+            # Restarted: transport numbers begin again from 0
+            transports.clear()
+            pending.clear()
+            continue
+        else:
+            session = None
+            connection = NEW_CONNECTION.match(message)
+            if connection:
+                session = connection["session"]
+                pending.setdefault(connection["ip"], deque()).append(session)
+            transport = TRANSPORT.search(context)
+            if transport:
+                key = (transport["number"], transport["ip"])
+                if key not in transports and pending.get(transport["ip"]):
+                    transports[key] = pending[transport["ip"]].popleft()
+                session = transports.get(key)
+                if message.startswith("Connection lost after "):
+                    transports.pop(key, None)
+
+        if not message.startswith(_PREFIXES): continue
+        eventid = LOG_EVENT_PREFIXES[next(prefix for prefix in _PREFIXES if message.startswith(prefix))]
+        # Only download callbacks are logged without a session, anything else is not an attacker event
+        if session is None and not eventid.startswith("cowrie.session.file_download"): continue
+        yield timestamp, session, eventid
+
+
+def _seconds(timestamp) -> float:
+    # Text from the streamed files, datetimes from the frames
+    if isinstance(timestamp, datetime): return timestamp.timestamp()
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def _compatible(json_event: tuple, log_event: tuple) -> bool:
+    """Same kind of event, and the same session unless the log line had none (download callbacks)"""
+    return json_event[4].startswith(log_event[4]) and log_event[3] in (None, json_event[3])
+
+
+def join_events(json_events, log_events, window: float = MATCH_WINDOW) -> dict:
+    """Merge two time-ordered (timestamp, session, eventid) streams in one pass.
+    An event is matched with an unmatched event of the other side within window seconds,
+    preferring an exact (timestamp, session) match. Anything older than the window is missing"""
+    tagged = lambda events, side: ((_seconds(event[0]), side, *event) for event in events)
+    merged = heapq.merge(tagged(json_events, 0), tagged(log_events, 1), key=lambda event: event[0])
+    waiting = (deque(), deque())        # unmatched json / log events still inside the window
+    sides = ("missing_from_log", "missing_from_json")
+    result = {"json_events": 0, "log_events": 0, "matched": 0,
+              "missing_from_log": [], "missing_from_json": [],
+              "missing_from_log_count": 0, "missing_from_json_count": 0,
+              "missing_from_log_by_event": Counter(), "missing_from_json_by_event": Counter()}
+
+    def expire(side: int, before: float):
+        queue = waiting[side]
+        while queue and queue[0][0] < before:
+            event = queue.popleft()
+            result[f"{sides[side]}_count"] += 1
+            result[f"{sides[side]}_by_event"][event[4]] += 1
+            if len(result[sides[side]]) < MISSING_KEPT:
+                result[sides[side]].append(event[2:])
+
+    for event in merged:
+        side = event[1]
+        result["log_events" if side else "json_events"] += 1
+        expire(0, event[0] - window)
+        expire(1, event[0] - window)
+
+        others = waiting[1 - side]
+        pairs = [(event, other) if side == 0 else (other, event) for other in others]
+        exact = next((i for i, (j, l) in enumerate(pairs)
+                      if j[2] == l[2] and j[3] == l[3] and _compatible(j, l)), None)
+        partner = exact if exact is not None else next(
+            (i for i, (j, l) in enumerate(pairs) if _compatible(j, l)), None)
+        if partner is None:
+            waiting[side].append(event)
+        else:
+            del others[partner]
+            result["matched"] += 1
+
+    expire(0, float("inf"))
+    expire(1, float("inf"))
+    result["agree_flag"] = not result["missing_from_log_count"] and not result["missing_from_json_count"]
+    return result
+
+
+def join_logs(json_path: Path, log_path: Path) -> dict:
+    """Stream cowrie.json and cowrie.log (with rotations) once and report the events missing from either"""
+    return join_events(iter_json_events(json_path), iter_log_events(log_path))
+
+
+def join_frames(json_df: pd.DataFrame, log_df: pd.DataFrame) -> dict:
+    """join_logs of the frames load_experiment already parsed (cached), without reading the files again"""
+    return join_events(frame_json_events(json_df), frame_log_events(log_df))
@@ -0,0 +1,172 @@
+# ============================================================================
+# logset.py - Rotated and compressed Cowrie log sets
+# cowrie.cfg uses logtype=rotating, so a long-running sensor leaves
+#   cowrie.json.2026-03-25 (or cowrie.log.2026_3_25 from twisted) files next
+#   to the live log, which are then often gzip/zstd compressed. A log set is
+#   every rotation of one log, oldest first with the live file last. Members
+#   are decompressed on the fly and streamed line by line so memory stays
+#   bounded, and members whose day falls outside a time window are skipped.
+#   A truncated / corrupt archive keeps what decompressed before the damage
+#   and is reported, the rest of the set is still read.
+# ============================================================================
+import bz2
+import gzip
+import io
+import lzma
+import re
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from colorama import Fore, Style
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")
+# cowrie.json.2026-03-25 / cowrie.log.2026_3_25 / cowrie.log.1 (logrotate), optionally compressed
+ROTATION_SUFFIX = re.compile(
+    r"^\.(?:(?P<year>\d{4})[-_](?P<month>\d{1,2})[-_](?P<day>\d{1,2})|(?P<number>\d+))"
+    r"(?P<compression>\.(?:gz|bz2|xz|zst))?$")
+# Assumed expansion of a compressed log whose archive does not record its size (text logs: 8-20x)
+COMPRESSION_RATIO = 10
+# Members already reported as unreadable, so repeated lookups do not repeat the warning
+_warned = set()
+# Raised while decompressing a truncated / corrupt member (BadGzipFile is an OSError)
+MEMBER_ERRORS = (OSError, EOFError, lzma.LZMAError) + ((zstandard.ZstdError,) if zstandard else ())
+# Decompressed bytes per read in read_member
+READ_BYTES = 1 << 20
+
+
+def member_day(path: Path, live: Path):
+    """Day a rotated member covers, None for the live file or numbered rotations"""
+    match = ROTATION_SUFFIX.match(path.name[len(live.name):])
+    if not match or not match["year"]: return None
+    return date(int(match["year"]), int(match["month"]), int(match["day"]))
+
+
+def _sort_key(path: Path, live: Path) -> tuple:
+    # Dated rotations by day, then logrotate numbers (higher = older), live file last
+    if path == live: return (2, date.max, 0)
+    match = ROTATION_SUFFIX.match(path.name[len(live.name):])
+    if match["year"]: return (0, member_day(path, live), 0)
+    return (1, date.max, -int(match["number"]))
+
+
+def _day_bounds(day: date) -> tuple:
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def find_log_set(live: Path, since: datetime = None, until: datetime = None) -> list:
+    """All members of a log set in time order, live file last.
+    since/until (tz-aware) drop members whose whole day falls outside the window"""
+    if not live.parent.exists(): return []
+    members = [path for path in live.parent.glob(f"{live.name}*")
+               if path == live or ROTATION_SUFFIX.match(path.name[len(live.name):])]
+    members.sort(key=lambda path: _sort_key(path, live))
+
+    kept = []
+    for path in members:
+        if path.suffix == ".zst" and zstandard is None:
+            if path not in _warned:
+                print(f"{Fore.YELLOW}    Skipped {path.name}: zstandard module not installed{Style.RESET_ALL}")
+                _warned.add(path)
+            continue
+        day = member_day(path, live)
+        if day is not None:
+            start, end = _day_bounds(day)
+            if (since and end <= since) or (until and start > until): continue
+        kept.append(path)
+
+    # The live file only holds events after the newest dated rotation
+    days = [member_day(path, live) for path in members if member_day(path, live)]
+    if live in kept and days and until and until < _day_bounds(max(days))[1]:
+        kept.remove(live)
+    return kept
+
+
+def is_compressed(path: Path) -> bool:
+    return path.suffix in COMPRESSED_SUFFIXES
+
+
+def member_bytes(path: Path) -> int:
+    """Decompressed size of one member, estimated where the archive does not record it.
+    zstd usually records it in the frame header. gzip's trailer has it mod 2**32, so the
+    larger of that and the COMPRESSION_RATIO estimate is used, as for bz2 / xz"""
+    size = path.stat().st_size
+    if not is_compressed(path): return size
+    estimate = size * COMPRESSION_RATIO
+    try:
+        with open(path, "rb") as file:
+            if path.suffix == ".gz" and size >= 4:
+                file.seek(-4, io.SEEK_END)
+                return max(estimate, int.from_bytes(file.read(4), "little"))
+            if path.suffix == ".zst" and zstandard is not None:
+                try:
+                    content_size = zstandard.frame_content_size(file.read(18))
+                except zstandard.ZstdError:
+                    content_size = -1       # not recorded / damaged header
+                if content_size > 0: return content_size
+    except OSError:
+        pass
+    return estimate
+
+
+def open_member(path: Path):
+    """Open one member for binary reading, decompressing as a stream"""
+    if path.suffix == ".gz": return gzip.open(path, "rb")
+    if path.suffix == ".bz2": return bz2.open(path, "rb")
+    if path.suffix == ".xz": return lzma.open(path, "rb")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"{path.name} is zstd compressed but the zstandard module is not installed")
+        # zstd's reader has no line iteration of its own, so put a buffered reader on top
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+
+def _unreadable(path: Path, error: Exception):
+    if path in _warned: return
+    print(f"{Fore.YELLOW}    Skipped the rest of {path.name}: {error}{Style.RESET_ALL}")
+    _warned.add(path)
+
+
+def iter_member_lines(path: Path):
+    """Yield raw lines (bytes) from one member, up to any damage in it"""
+    try:
+        with open_member(path) as file:
+            yield from file
+    except MEMBER_ERRORS as error:
+        _unreadable(path, error)
+
+
+def read_member(path: Path) -> bytes:
+    """One member decompressed whole, up to any damage in it"""
+    blocks = []
+    try:
+        with open_member(path) as file:
+            while block := file.read(READ_BYTES):
+                blocks.append(block)
+    except MEMBER_ERRORS as error:
+        _unreadable(path, error)
+    return b"".join(blocks)
+
+
+def iter_log_lines(live: Path, since: datetime = None, until: datetime = None):
+    """Stream every line of a log set, oldest member first"""
+    for path in find_log_set(live, since, until):
+        yield from iter_member_lines(path)
+
+
+def iter_line_batches(live: Path, batch_lines: int, since: datetime = None, until: datetime = None):
+    """Stream a log set as lists of at most batch_lines raw lines"""
+    batch = []
+    for line in iter_log_lines(live, since, until):
+        batch.append(line)
+        if len(batch) >= batch_lines:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
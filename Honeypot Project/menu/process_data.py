@@ -4,33 +4,40 @@ import re
 import sys
 import os
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 
 
 import pandas as pd
 from colorama import Fore, Style
-from menu.utils_process_data import extract_commands, extract_downloads, extract_sessions, extract_aa_denials, extract_seccomp_bpf
+from menu.utils_process_data import (
+    extract_commands, extract_downloads, session_count, session_summary, extract_aa_denials, extract_seccomp_bpf,
+    compact_frame, concat_frames, frame_memory, partition_index, event_counts, denial_cube, cube_counts)
 from menu.utils import clear_screen, print_header, print_separator, pause
 from menu.display_analysis import generate_charts
+from menu.ingest import ingest_json_lines
+from menu.decode_json import decode_cowrie_lines, TIMESTAMP_FORMAT
+from menu.cache import cached_parse, CACHE_DIR_NAME
+from menu.logset import find_log_set, is_compressed, iter_member_lines, member_bytes, read_member
+from menu.logjoin import join_frames, join_logs
+from menu.align import align_commands, alignment_summary, streams_match
+from menu.latency import latency_deltas, latency_summary
+from menu.audit_events import parse_audit_events
+from menu.chunked import (
+    CHUNK_LINES, OUT_OF_CORE_BYTES, stream_summary, summarise_events, summarise_log_lines, summarise_audit)
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 RESULTS_DIR = Path(__file__).parent.parent / "results"
-
-# https://chromium.googlesource.com/chromiumos/docs/+/master/constants/syscalls.md
-# https://syscalls.mebeim.net/?table=x86/64/x64/latest
-# Also built from common syscall logs reviewed over + researched
-#    and after examining the syscalls produced from different malware samples
-SYSCALL_NAMES = {
-    "11" : "execve",
-    "192":"nmap2",
-    "45":"brk",
-    "54":  "ioctl",
-    "102": "socketcall",
-    "119": "sigreturn",
-    "90":  "mmap",
-    "125": "mprotect"
-}
+# Differing commands printed per session pair before the rest are only counted
+ALIGNMENT_SHOWN = 20
+# Missing events printed per log by the json / log join
+LOG_JOIN_SHOWN = 10
+# Slowest shared commands printed by the latency overhead section
+LATENCY_SHOWN = 5
+# Correlated audit events printed (process, syscall, cwd, argv)
+AUDIT_EVENTS_SHOWN = 20
 
 # ------------------------------ DIRECTORY DISCOVERY ------------------------------
 def find_dirs():
@@ -51,104 +58,270 @@ def find_dirs():
 
 
 # ------------------------------ LOG PARSING ------------------------------
+# Record header: type=AVC msg=audit(1775917844.595:856): ...
+AUDIT_HEADER = re.compile(r"^type=(?P<type>AVC|SECCOMP) msg=audit\((?P<timestamp_part>\d+\.\d+):(?P<audit_id>\d+)\):")
+# Every key=value / key="value" pair after the header
+AUDIT_FIELD = re.compile(r"(?P<key>\w+)=(?:\"(?P<quoted>[^\"]*)\"|(?P<bare>\S+))")
+
 def parse_aa_log(path: Path) -> pd.DataFrame:
     # audit.log is in the format key:value pairs, unlike JSON strings
     if not path.exists() or path.stat().st_size == 0: return pd.DataFrame()
-
-    rows = []
-
-    with open(path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if not line: continue
-            # Create var for current row of data
-            current_row = {}
-            # If the current log is not SECCOMP or AVC, skip
-            if not line.startswith("type=AVC") and not line.startswith("type=SECCOMP"): continue
-            # Extract the log type: logs start with type=AVC msg=audit(......)
-            # Split line on whitespaces, take the first word (type=..), 
-            # Split that word on '=' and take the 1st value (not Type but rather AVC/SECCOMP)
-            current_row["type"] = line.split()[0].split("=")[1]
-
-            # Extract the audit timestamp from msg=audit(........:####), where timestamp is unix time in ms
-            if "audit(" in line:
-                # Split on audit( and store timestamp: i.e 12341231312.456              
-                # Convert data to approriate format
-                audit_part = line.split("audit(")[1].split(")")[0]
-                # Take the first part (timestamp + ID), split on timestamp to get time and ID
-                timestamp_part, audit_id = audit_part.split(":")
-                current_row["timestamp_part"] = float(timestamp_part)
-                current_row["audit_id"] = float(audit_id)
-
-            # Extract all key:value pairs after type, timestamp and audit ID
-            for part in line.split():# Split all remaining data
-                if "=" in part and not part.startswith("type=") and not part.startswith("msg="):
-                    # Split data before '=' and after '=', retaning the middle value
-                    key, index, value = part.partition("=")
-                    current_row[key.strip()] = value.strip().strip('"')
-                if current_row: rows.append(current_row)
-    if not rows: return pd.DataFrame()
-
-    # Convert timestamp to UTC in seconds
-    df = pd.DataFrame(rows)
-    df["timestamp"] = pd.to_datetime(df["timestamp_part"], unit="s", utc=True)
-    # Drop all duplicate audit events
-    if "audit_id" in df.columns:
-        df = df.drop_duplicates(subset=["audit_id"])
-    return df.sort_values("timestamp").reset_index(drop=True)
-
-def parse_cowrie_json(path: Path) -> pd.DataFrame:
-    # Parse in path to cowrie.log as Path, and return as pandas dataframe
-    if not path.exists() or path.stat().st_size == 0: return pd.DataFrame()
-    
-    records = []
-
-    with open(path, "r") as file:
-        for line in file:
-            line = line.strip()
-            if line:
-                try: records.append(json.loads(line))
-                except: pass
-    if not records: return pd.DataFrame()
-    dataframe = pd.DataFrame(records)
-    dataframe["timestamp"] = pd.to_datetime(dataframe["timestamp"], utc=True)
-    return dataframe.sort_values("timestamp").reset_index(drop=True)
+    return parse_aa_lines(path.read_text(errors="replace").splitlines())
+
+def parse_aa_lines(lines: list) -> pd.DataFrame:
+    # Lines are parsed with two vectorised regex passes, giving exactly one row per AVC / SECCOMP record
+    lines = pd.Series(lines, dtype=object)
+    header = lines.str.extract(AUDIT_HEADER)
+    # Keep only AVC and SECCOMP records
+    records = header["type"].notna()
+    if not records.any(): return pd.DataFrame()
+    header, lines = header[records], lines[records]
+
+    # One row per (record, key=value) pair, then pivot back to one wide row per record
+    fields = lines.str.extractall(AUDIT_FIELD).droplevel("match")
+    fields = fields[~fields["key"].isin(["type", "msg"])]
+    values = fields["quoted"].fillna(fields["bare"])
+    values.index = pd.MultiIndex.from_arrays([fields.index, fields["key"]])
+    # A key repeated inside one record keeps its first value
+    wide = values[~values.index.duplicated()].unstack()
+    wide.columns.name = None
+
+    df = header.join(wide)
+    df["timestamp_part"] = df["timestamp_part"].astype(float)
+    df["audit_id"] = df["audit_id"].astype("int64")
+    # Convert timestamp to UTC - via integer ms so 1775917844.595 does not become .594999933
+    millis = pd.to_numeric(header["timestamp_part"].str.replace(".", "", regex=False))
+    df["timestamp"] = pd.to_datetime(millis, unit="ms", utc=True)
+    return compact_frame(df.sort_values("timestamp", kind="stable").reset_index(drop=True))
+
+def _concat_members(frames: list) -> pd.DataFrame:
+    # Join per-member frames of a log set, keeping integer counters in attrs (e.g. malformed_lines)
+    counters = {}
+    for frame in frames:
+        for key, value in frame.attrs.items():
+            if isinstance(value, int): counters[key] = counters.get(key, 0) + value
+    dataframe = concat_frames(frames)
+    if not dataframe.empty:
+        if not dataframe["timestamp"].is_monotonic_increasing:
+            dataframe = dataframe.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    dataframe.attrs = counters
+    return dataframe
+
+def _clip_window(dataframe: pd.DataFrame, since=None, until=None) -> pd.DataFrame:
+    # Keep rows inside [since, until]; rotation members outside it were already skipped whole
+    if dataframe.empty or (since is None and until is None): return dataframe
+    keep = pd.Series(True, index=dataframe.index)
+    if since is not None: keep &= dataframe["timestamp"] >= since
+    if until is not None: keep &= dataframe["timestamp"] <= until
+    clipped = dataframe[keep].reset_index(drop=True)
+    clipped.attrs = dataframe.attrs
+    return clipped
+
+def parse_cowrie_json(path: Path, incremental: bool = True, since=None, until=None) -> pd.DataFrame:
+    # Parse in path to cowrie.json as Path, and return as pandas dataframe
+    # Every rotation (cowrie.json.YYYY-MM-DD[.gz|.zst]) is read too, oldest first - see menu/logset.py
+    # Incremental: uncompressed members only decode lines appended since the last run (see menu/ingest.py)
+    frames = []
+    for member in find_log_set(path, since, until):
+        if member.stat().st_size == 0: continue
+        if incremental and not is_compressed(member):
+            frames.append(ingest_json_lines(member, decode_cowrie_lines))
+        else:
+            frames.append(decode_cowrie_lines(iter_member_lines(member)))
+    return _clip_window(_concat_members(frames), since, until)
 
 
 # Parse in path to cowrie.log as Path, and return as pandas dataframe
-def parse_cowrie_log(path: Path) -> pd.DataFrame:
-    # If not exist or path's metadata says size is 0 bytes
-    if not path.exists() or path.stat().st_size == 0:
-        return pd.DataFrame()
-    
-    rows = []
-    with open(path, "r") as file:
-        for line in file:
-            if not line: continue
-            parts = line.split(" ", maxsplit=2)
-            if len(parts) != 3: continue
-            # Validate whether the timestamp looks like a timestamp, 
-            if not parts[0].startswith("20"): continue            
-            rows.append({                   
-                "timestamp": parts[0],
-                "session" : parts[1],
-                "message" : parts[2],})
-    if not rows: return pd.DataFrame()
-    
-    # Convert list to dataframe
-    dataframe = pd.DataFrame(rows)
-    # Convert timestamps from enoch to UTC (consistent w/ honeypots) 
-    dataframe["timestamp"] = pd.to_datetime(dataframe["timestamp"], utc=True)
+# Lines look like: 2026-01-29T16:36:29.347241+0000 [HoneyPotSSHTransport,2,127.0.0.1] CMD: uname -a
+def _split_log_lines(lines: list) -> pd.DataFrame:
+    # Split every line of one log buffer into its 3 fields at once
+    lines = pd.Series(lines, dtype=object)
+    # Validate whether the timestamp looks like a timestamp (skips traceback continuation lines etc.)
+    lines = lines[lines.str.startswith("20")]
+    if lines.empty: return pd.DataFrame()
+    dataframe = lines.str.split(" ", n=2, expand=True)
+    if dataframe.shape[1] != 3: return pd.DataFrame()
+    dataframe.columns = ["timestamp", "session", "message"]
+    dataframe = dataframe.dropna(subset=["message"])
+
+    # Convert timestamps to UTC (consistent w/ honeypots), same explicit format cowrie.json uses
+    dataframe["timestamp"] = pd.to_datetime(dataframe["timestamp"], format=TIMESTAMP_FORMAT, utc=True, errors="coerce")
+    dataframe = dataframe.dropna(subset=["timestamp"])
     # Return dataframe sorted by timestamp, and reset index of this dataframe
-    return dataframe.sort_values("timestamp").reset_index(drop=True)
+    return compact_frame(dataframe.sort_values("timestamp", kind="stable").reset_index(drop=True))
+
+def parse_cowrie_log(path: Path, since=None, until=None) -> pd.DataFrame:
+    # Each member of the log set (rotations, decompressed on the fly) is read as one buffer
+    frames = []
+    for member in find_log_set(path, since, until):
+        # If path's metadata says size is 0 bytes
+        if member.stat().st_size == 0: continue
+        frames.append(_split_log_lines(read_member(member).decode(errors="replace").splitlines()))
+    return _clip_window(_concat_members(frames), since, until)
+
+
+# ------------------------------ EXPERIMENT LOADING ------------------------------
+# Each experiment has five independent log sources: cache key -> (path inside experiment, parser)
+EXPERIMENT_SOURCES = {
+    "vanilla_cowrie.json": ("vanilla/cowrie.json", parse_cowrie_json),
+    "vanilla_cowrie.log": ("vanilla/cowrie.log", parse_cowrie_log),
+    "containerised_cowrie.json": ("containerised/cowrie.json", parse_cowrie_json),
+    "containerised_cowrie.log": ("containerised/cowrie.log", parse_cowrie_log),
+    # /var/log/audit/audit.log extract
+    "containerised_apparmor_denials.log": ("containerised/apparmor_denials.log", parse_aa_log),
+    # Same file, one row per event with its SYSCALL / CWD / PATH / PROCTITLE records joined on
+    "containerised_audit_events": ("containerised/apparmor_denials.log", parse_audit_events),
+}
+# Parsed through menu/ingest.py, which checkpoints the frame of every uncompressed member
+CHECKPOINTED_SOURCES = {"vanilla_cowrie.json", "containerised_cowrie.json"}
+# Rotated log sets, whose parsers take a since / until window
+COWRIE_SOURCES = {*CHECKPOINTED_SOURCES, "vanilla_cowrie.log", "containerised_cowrie.log"}
+# Below this many bytes in total, starting worker processes costs more than parsing serially
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+def load_source(experiment_dir: Path, key: str, since=None, until=None) -> pd.DataFrame:
+    # Parse one source through the frame cache. Top-level so the process pool can pickle it
+    # Without compressed rotations the ingest checkpoints already hold the whole frame,
+    #   a cache entry would only be a second copy of it
+    # since/until (tz-aware) keep only that window. The cowrie logs skip rotations outside it
+    #   and are not cached (the cache holds whole logs), the audit extract is clipped
+    relative_path, parser = EXPERIMENT_SOURCES[key]
+    path = experiment_dir / relative_path
+    windowed = since is not None or until is not None
+    if key in COWRIE_SOURCES and windowed:
+        return parser(path, since=since, until=until)
+    if key in CHECKPOINTED_SOURCES and not any(is_compressed(member) for member in find_log_set(path)):
+        return parser(path)
+    frame = cached_parse(experiment_dir / CACHE_DIR_NAME, path, parser, key)
+    return _clip_window(frame, since, until) if windowed else frame
+
+def experiment_bytes(experiment_dir: Path, since=None, until=None) -> int:
+    # Decompressed bytes every source would parse into memory - the audit log is counted once
+    #   per frame built from it. Decides between the in-memory and chunked paths
+    return sum(member_bytes(member) for relative_path, parser in EXPERIMENT_SOURCES.values()
+               for member in find_log_set(experiment_dir / relative_path, since, until))
+
+def needs_out_of_core(experiment_dir: Path, since=None, until=None) -> bool:
+    return experiment_bytes(experiment_dir, since, until) > OUT_OF_CORE_BYTES
+
+def _index_frames(frames: dict) -> dict:
+    # Build the eventid / audit type partition once, here, so every extractor and chart just reads it
+    for key, frame in frames.items():
+        partition_index(frame, "type" if key.endswith("apparmor_denials.log") else "eventid")
+    return frames
+
+def load_experiment(experiment_dir: Path, parallel: bool = True, since=None, until=None) -> dict:
+    # Parse every source of one experiment, returns {cache key: dataframe}
+    # parallel=False when already inside a worker process (batch analysis)
+    # since/until (tz-aware) limit every source to that window, see load_source
+    sizes = {}
+    for key, (relative_path, parser) in EXPERIMENT_SOURCES.items():
+        sizes[key] = sum(member.stat().st_size
+                         for member in find_log_set(experiment_dir / relative_path, since, until))
+
+    if not parallel or sum(sizes.values()) < PARALLEL_MIN_BYTES:
+        return _index_frames({key: load_source(experiment_dir, key, since, until) for key in EXPERIMENT_SOURCES})
+
+    # Largest first, so the slowest parse starts straight away and bounds the total time
+    order = sorted(EXPERIMENT_SOURCES, key=lambda key: sizes[key], reverse=True)
+    with ProcessPoolExecutor(max_workers=min(len(order), os.cpu_count() or 1)) as pool:
+        futures = {key: pool.submit(load_source, experiment_dir, key, since, until) for key in order}
+        frames = {key: futures[key].result() for key in EXPERIMENT_SOURCES}
+    return _index_frames(frames)
+
+
+# ------------------------------ OUT-OF-CORE (CHUNKED) ANALYSIS ------------------------------
+def _decode_text_lines(batch: list) -> list:
+    return [line.decode(errors="replace").rstrip("\r\n") for line in batch]
+
+def summarise_experiment_chunked(experiment_dir: Path, since=None, until=None) -> dict:
+    # Stream every source in CHUNK_LINES batches and merge partial summaries (see menu/chunked.py)
+    # Memory stays bounded by the batch size, no matter how large the logs are
+    # since/until: rotations outside the window are skipped, each batch is clipped to it
+    clip = lambda frame: _clip_window(frame, since, until)
+    summaries = {}
+    for label in ["vanilla", "containerised"]:
+        summaries[f"{label}_json"] = stream_summary(
+            experiment_dir / label / "cowrie.json", lambda batch: clip(decode_cowrie_lines(batch)),
+            summarise_events, since=since, until=until)
+        summaries[f"{label}_log"] = stream_summary(
+            experiment_dir / label / "cowrie.log", lambda batch: clip(_split_log_lines(_decode_text_lines(batch))),
+            summarise_log_lines, since=since, until=until)
+    summaries["audit"] = stream_summary(
+        experiment_dir / "containerised" / "apparmor_denials.log",
+        lambda batch: clip(parse_aa_lines(_decode_text_lines(batch))), summarise_audit)
+    return summaries
+
+def compare_summaries(v: dict, c: dict) -> dict:
+    # Same findings as compare_data, from merged partial summaries instead of whole frames
+    return {
+        "vanilla_session_count": v["session_count"],
+        "containerised_session_count": c["session_count"],
+        "vanilla_average_duration": v["duration_sum"] / v["duration_count"] if v["duration_count"] else float("nan"),
+        "containerised_average_duration": c["duration_sum"] / c["duration_count"] if c["duration_count"] else float("nan"),
+        "vanilla_cmd_count": v["command_count"],
+        "containerised_cmd_count": c["command_count"],
+        "commands_match": v["commands"] == c["commands"],
+        "hashes_match": v["hashes"] == c["hashes"],
+        "shared_hashes": v["hashes"] & c["hashes"],
+        "vanilla_only_hashes": v["hashes"] - c["hashes"],
+        "containerised_only_hashes": c["hashes"] - v["hashes"],
+        # Per-command rows are not kept in chunked mode
+        "vanilla_cmds": None,
+        "containerised_cmds": None,
+        "alignment": None,
+    }
 
+def run_chunked_analysis(experiment_dir: Path, since=None, until=None) -> dict:
+    # Print the analysis of an experiment too large to load, using bounded memory
+    # Returns the same summary row as report_experiment
+    print(f"{Fore.YELLOW}Logs exceed {OUT_OF_CORE_BYTES / 1024 ** 3:.0f} GiB - running chunked analysis "
+          f"({CHUNK_LINES:,} lines per batch){Style.RESET_ALL}")
+    summaries = summarise_experiment_chunked(experiment_dir, since, until)
+
+    for label in ["vanilla", "containerised"]:
+        events, log = summaries[f"{label}_json"], summaries[f"{label}_log"]
+        print(f"\n{Fore.CYAN}{label.capitalize()} Honeypot{Style.RESET_ALL}")
+        print_separator()
+        print(f"{Fore.GREEN}cowrie.json {sum(events['events'].values())} events{Style.RESET_ALL}")
+        if events["malformed_lines"]:
+            print(f"    {Fore.YELLOW}{events['malformed_lines']} malformed line(s) skipped{Style.RESET_ALL}")
+        for event_type, count in events["events"].most_common():
+            print(f"    {count:>4} {event_type}")
+        print(f"    {Fore.GREEN}cowrie.log {log['lines']} lines{Style.RESET_ALL}")
+
+    print(f"\n{Fore.CYAN}    LOG CROSS-EXAMINATION{Style.RESET_ALL}")
+    print_separator()
+    for label in ["vanilla", "containerised"]:
+        events, log = summaries[f"{label}_json"], summaries[f"{label}_log"]
+        if log["lines"]:
+            print_cross_check(label.capitalize(), {
+                "json_command_count": events["command_count"],
+                "log_command_count": log["command_lines"],
+                "agree_flag": events["command_count"] == log["command_lines"]})
+            print_log_join(join_logs(experiment_dir / label / "cowrie.json", experiment_dir / label / "cowrie.log"))
+
+    results = compare_summaries(summaries["vanilla_json"], summaries["containerised_json"])
+    print_comparison(results)
+
+    audit = summaries["audit"]
+    if audit["aa_total"] or audit["seccomp_total"]:
+        print_denials({**{key: dict(value.most_common()) if isinstance(value, Counter) else value
+                          for key, value in audit.items()},
+                       "aa_rows": pd.DataFrame(), "seccomp_rows": pd.DataFrame()})
+    else:
+        print(f"{Fore.YELLOW}No AppArmor / Seccomp logs found. Are you sure you ran the third test?{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}    Charts are not generated in chunked mode{Style.RESET_ALL}")
+
+    agree = {label: summaries[f"{label}_json"]["command_count"] == summaries[f"{label}_log"]["command_lines"]
+             if summaries[f"{label}_log"]["lines"] else None for label in ["vanilla", "containerised"]}
+    return summary_row(experiment_dir, "chunked", results, agree, audit)
 
-    
 
 # ------------------------------ CROSS EXAMINATION ------------------------------
 def cross_check(json_df: pd.DataFrame, log_df: pd.DataFrame) -> dict:
     # Check whether cowrie.json & cowrie.log agree on command count
-    json_cmd_count = len(json_df[json_df["eventid"] == "cowrie.command.input"])
+    json_cmd_count = len(partition_index(json_df).get("cowrie.command.input", []))
     log_cmd_count = len(log_df[log_df["message"].str.startswith("CMD")])
     
     return {
@@ -167,28 +340,34 @@ def compare_data(v_df: pd.DataFrame, c_df: pd.DataFrame) -> dict:
     # Extract downloads for vanilla and cowrie json
     v_dls = extract_downloads(v_df)
     c_dls = extract_downloads(c_df)
-    # Extract sessions ......
-    v_sesh = extract_sessions(v_df)
-    c_sesh = extract_sessions(c_df)
+    # Per-session table (connect/close, duration, command + download counts, login, profile)
+    v_sesh = session_summary(v_df)
+    c_sesh = session_summary(c_df)
     # Store hashes in a set for enumeration
     v_hashes = set(v_dls["shasum"].dropna())    # Drop any NULL
     c_hashes = set(c_dls["shasum"].dropna())
 
+    # Align the two command streams session by session (order and repetition count)
+    alignment = align_commands(v_cmd, c_cmd, v_sesh, c_sesh)
+
     # Return a dictionary of comparison results
     return{
-        "vanilla_session_count" : len(v_sesh),
-        "containerised_session_count" : len(c_sesh),
+        "vanilla_session_count" : session_count(v_df),
+        "containerised_session_count" : session_count(c_df),
         "vanilla_average_duration" : v_sesh["duration"].mean(),
         "containerised_average_duration": c_sesh["duration"].mean(),
-        "vanilla_cmd_count": len(v_cmd),
-        "containerised_cmd_count" : len(c_cmd),
-        "commands_match": set(v_cmd["input"]) == set(c_cmd["input"]),
+        "vanilla_cmd_count": int(v_sesh["command_count"].sum()),
+        "containerised_cmd_count" : int(c_sesh["command_count"].sum()),
+        "commands_match": streams_match(alignment),
         "hashes_match": c_hashes == v_hashes,
         "shared_hashes": c_hashes & v_hashes,
         "vanilla_only_hashes": v_hashes - c_hashes,
         "containerised_only_hashes": c_hashes - v_hashes,
         "vanilla_cmds" : v_cmd,
         "containerised_cmds": c_cmd,
+        "vanilla_sessions": v_sesh,
+        "containerised_sessions": c_sesh,
+        "alignment": alignment,
     }
     
 
@@ -197,25 +376,44 @@ def print_cross_check(label: str, results:dict):
                   else f"{Fore.RED}FALSE{Style.RESET_ALL}")
     print(f"    {label:<16} json={results['json_command_count']}" f" log={results['log_command_count']} {agree_flag}")
 
-
-def analyse_aa_seccomp_denials(aa_df : pd.DataFrame, seccomp_df : pd.DataFrame) -> dict:
+def print_log_join(results: dict):
+    # Events one log has and the other does not, grouped by eventid, then the first few of each
+    for side, other in [("missing_from_log", "cowrie.log"), ("missing_from_json", "cowrie.json")]:
+        count = results[f"{side}_count"]
+        if not count: continue
+        kinds = ", ".join(f"{n} {eventid}" for eventid, n in results[f"{side}_by_event"].most_common())
+        print(f"        {Fore.YELLOW}{count} event(s) missing from {other}:{Style.RESET_ALL} {kinds}")
+        for timestamp, session, eventid in results[side][:LOG_JOIN_SHOWN]:
+            if not isinstance(timestamp, str): timestamp = timestamp.strftime(TIMESTAMP_FORMAT)
+            print(f"            {timestamp:<32} {str(session):<14} {eventid}")
+        if count > LOG_JOIN_SHOWN:
+            print(f"            ... {count - LOG_JOIN_SHOWN} more")
+    if results["agree_flag"]:
+        print(f"        {Fore.GREEN}all {results['matched']} events present in both logs{Style.RESET_ALL}")
+
+
+def analyse_aa_seccomp_denials(aa_df : pd.DataFrame, seccomp_df : pd.DataFrame, aa_cube: pd.Series = None) -> dict:
     # Analyse both seccomp and apparmor logs on operation and which process, return results as dict
+    # AppArmor counts are summed from the denial cube (the charts read the same one)
     aa_by_operation = {}
     aa_by_process = {}
     seccomp_by_syscall = {}
     seccomp_by_process = {}
 
     if not aa_df.empty:
+        aa_cube = denial_cube(aa_df) if aa_cube is None else aa_cube
         # If operation flag exists in apparmor logs, extract it
         if "operation" in aa_df.columns:
-            aa_by_operation = aa_df["operation"].value_counts().to_dict()
+            aa_by_operation = cube_counts(aa_cube, "operation").to_dict()
         # Do the same for process
         if "comm" in aa_df.columns:
-            aa_by_process = aa_df["comm"].value_counts().to_dict()
+            aa_by_process = cube_counts(aa_cube, "comm").to_dict()
 
     if not seccomp_df.empty:
         if "syscall" in seccomp_df.columns:
-            seccomp_by_syscall = seccomp_df["syscall"].value_counts().to_dict()
+            # Keyed (number, name) - the name depends on the record's arch, not just the number
+            counts = seccomp_df[["syscall", "syscall_name"]].value_counts()
+            seccomp_by_syscall = counts[counts > 0].to_dict()
         if "comm" in seccomp_df.columns:
             seccomp_by_process = seccomp_df["comm"].value_counts().to_dict()
     return{
@@ -235,11 +433,15 @@ def display_summary(label:str, json_df: pd.DataFrame, log_df: pd.DataFrame):
     print_separator()
 
     print(f"{Fore.GREEN}cowrie.json {len(json_df)} events{Style.RESET_ALL}")
-    event_counter = json_df["eventid"].value_counts()
+    if json_df.attrs.get("malformed_lines"):
+        print(f"    {Fore.YELLOW}{json_df.attrs['malformed_lines']} malformed line(s) skipped{Style.RESET_ALL}")
+    event_counter = event_counts(json_df)
     for event_type, count in event_counter.items():
         print(f"    {count:>4} {event_type}")
 
     print(f"    {Fore.GREEN}cowrie.log {len(log_df)} lines{Style.RESET_ALL}")
+    print(f"    memory: cowrie.json {frame_memory(json_df) / 1024:,.0f} KiB, "
+          f"cowrie.log {frame_memory(log_df) / 1024:,.0f} KiB")
 
 def print_comparison(results : dict):
     print(f"\n{Fore.CYAN}SESSION COMPARISON{Style.RESET_ALL}")
@@ -259,16 +461,13 @@ def print_comparison(results : dict):
     match_string_comms = (f"{Fore.GREEN}TRUE{Style.RESET_ALL}" if results["commands_match"] else f"{Fore.RED}FALSE{Style.RESET_ALL}")
     print(f"    Do commands match : {match_string_comms}")
 
-    # Print details of commands
-    print(f"\n{Fore.CYAN}COMMAND DETAILS{Style.RESET_ALL}")
+    # Print the per-session alignment of the two command streams
+    print(f"\n{Fore.CYAN}COMMAND ALIGNMENT{Style.RESET_ALL}")
     print_separator()
-    # iterate through the extracted comms --> row and column
-    # Print label + the session ID aligned to the left + timestamp aligned to the left + truncated command up to 100 chars
-    print(f"    {'SESSION':<14} {'TIMESTAMP':<32} COMMAND")
-    for _, row in results["vanilla_cmds"].iterrows():
-        print(f"    [Vanilla] {row['session']:<10} {str(row['timestamp']):<32} {row['input'][:100]}")
-    for _, row in results["containerised_cmds"].iterrows():
-        print(f"    [Containerised] {row['session']:<10} {str(row['timestamp']):<32} {row['input'][:100]}")
+    if results["alignment"] is None:
+        print(f"    {Fore.YELLOW}(not kept in chunked mode){Style.RESET_ALL}")
+    else:
+        print_alignment(results["alignment"])
     
     # Print comparison of downloaded content
     print(f"\n{Fore.CYAN}DOWNLOADS DETAILS{Style.RESET_ALL}")
@@ -289,6 +488,55 @@ def print_comparison(results : dict):
             print(f"    {hash}")
 
 
+def print_alignment(alignment: pd.DataFrame):
+    # One line per session pair, then only the commands that differ (equal ones are just counted)
+    if alignment.empty:
+        print("    No commands in either honeypot")
+        return
+    approximate = set(alignment.attrs.get("approximate", []))
+    colours = {"deleted": Fore.RED, "inserted": Fore.GREEN, "moved": Fore.YELLOW}
+    differences = alignment[alignment["op"] != "equal"]
+    by_pair = differences.groupby("pair").indices
+    for _, pair in alignment_summary(alignment).iterrows():
+        note = f" {Fore.YELLOW}(approximate){Style.RESET_ALL}" if pair["pair"] in approximate else ""
+        print(f"    [Vanilla] {pair['vanilla_session']:<14} <-> [Containerised] {pair['containerised_session']}{note}")
+        print(f"        {pair['equal']} equal, {pair['deleted']} deleted, {pair['inserted']} inserted, "
+              f"{pair['moved']} moved | timing delta median {pair['median_delta']:+.2f}s max {pair['max_delta']:.2f}s")
+
+        changes = differences.iloc[by_pair.get(pair["pair"], [])]
+        shown = changes.head(ALIGNMENT_SHOWN)
+        for op, v_time, c_time, command in zip(shown["op"], shown["vanilla_time"],
+                                               shown["containerised_time"], shown["command"]):
+            v_at = f"{v_time:8.2f}s" if pd.notna(v_time) else f"{'-':>9}"
+            c_at = f"{c_time:8.2f}s" if pd.notna(c_time) else f"{'-':>9}"
+            print(f"        {colours[op]}{op:<9}{Style.RESET_ALL} v {v_at}  c {c_at}  {command[:100]}")
+        if len(changes) > ALIGNMENT_SHOWN:
+            print(f"        ... {len(changes) - ALIGNMENT_SHOWN} more difference(s)")
+
+def print_latency(summary: dict, deltas: pd.DataFrame):
+    # Containerised - vanilla response latency of the commands both honeypots ran
+    print(f"\n{Fore.CYAN}SANDBOX LATENCY OVERHEAD{Style.RESET_ALL}")
+    print_separator()
+    if not summary["measured"]:
+        print("    No commands with a measurable latency on both honeypots")
+        return
+    print(f"    {summary['measured']} of {summary['commands']} shared command(s) measured")
+    print(f"    delta p50 {summary['p50']:+.3f}s  p95 {summary['p95']:+.3f}s  p99 {summary['p99']:+.3f}s  "
+          f"mean {summary['mean']:+.3f}s  total {summary['total']:+.3f}s")
+    if not summary["with_denials"]:
+        # Nothing to attribute the added latency to, rather than "0% of it"
+        print("    No denials in any command window")
+    else:
+        print(f"    {summary['with_denials']} command(s) with AppArmor denials in their window")
+        print(f"        mean delta with denials {summary['mean_with_denials']:+.3f}s, "
+              f"without {summary['mean_without_denials']:+.3f}s")
+        if pd.notna(summary["denial_share"]):
+            print(f"        {summary['denial_share']:.0%} of the added latency is in windows with denials")
+    # Slowest commands in the sandbox
+    slowest = deltas.dropna(subset=["delta"]).nlargest(LATENCY_SHOWN, "delta")
+    for delta, denials, command in zip(slowest["delta"], slowest["denials"], slowest["command"]):
+        print(f"        {delta:+8.3f}s  {denials:>3} denial(s)  {command[:90]}")
+
 def print_denials(results:dict):
     print(f"\n{Fore.CYAN}APPARMOR DENIALS{Style.RESET_ALL}")
     print_separator()
@@ -319,8 +567,7 @@ def print_denials(results:dict):
     print(f"Total denials: {results['seccomp_total']}")
     if results["seccomp_syscall"]:
         print(f"\n By Operation: ")
-        for op, c in results['seccomp_syscall'].items():
-            name = SYSCALL_NAMES.get(op, "unknown")
+        for (op, name), c in results['seccomp_syscall'].items():
             print(f"    {c:>4} syscall {op} ({name})")
         if results["seccomp_by_process"]:
             print(f"\n By process:")
@@ -328,57 +575,76 @@ def print_denials(results:dict):
                 print(f"    {c:>4} {p}")
 
 
-# ------------------------------ MAIN ANALYSIS ------------------------------
-def run_analysis():
-    clear_screen()
-    print_header("Analysis")
-
-    # Find all directories with results
-    dirs_found = find_dirs()
-    if not dirs_found:
-        print(f"{Fore.RED}ERROR: No experiments found in: {Style.RESET_ALL} {RESULTS_DIR}")
-        pause()
+def print_audit_events(events: pd.DataFrame):
+    # Each denial / kill with what the process was: exe, syscall, cwd and full command line
+    print(f"\n{Fore.CYAN}AUDIT EVENTS{Style.RESET_ALL}")
+    print_separator()
+    if events.empty:
+        print("    No AVC / SECCOMP events")
         return
-    # Print directories and cancel option
-    print(f"{Fore.CYAN}Available experiments:\n{Style.RESET_ALL}")
-    for index, dir in enumerate(dirs_found):
-        print(f"    [{index+1}] {dir.name}")
-    print(f"{Fore.YELLOW}    [0] Cancel{Style.RESET_ALL}")
+    joined = int((events["records"] > 1).sum())
+    print(f"    {len(events)} event(s), {joined} with SYSCALL / CWD / PATH / PROCTITLE records joined")
+    for _, event in events.head(AUDIT_EVENTS_SHOWN).iterrows():
+        what = event["syscall_name"] if pd.notna(event["syscall_name"]) else event["operation"]
+        process = event["exe"] if pd.notna(event["exe"]) else event["comm"]
+        print(f"    {str(event['timestamp'])[:23]:<24} {event['type']:<8} {str(what):<12} {process}")
+        for label in ["cwd", "argv", "paths"]:
+            if pd.notna(event[label]):
+                print(f"        {label:<6} {str(event[label])[:100]}")
+    if len(events) > AUDIT_EVENTS_SHOWN:
+        print(f"    ... {len(events) - AUDIT_EVENTS_SHOWN} more event(s)")
 
-    choice = input(f"{Fore.CYAN}Select experiment: {Style.RESET_ALL}")
-    if choice == "0":
-        return
-    try:
-        chosen_result_dir = dirs_found[int(choice) - 1]
-        print(f"{Fore.CYAN}Analysing: {Style.RESET_ALL}{chosen_result_dir.name}")
-    except:
-        print(f"{Fore.RED}Invalid selection{Style.RESET_ALL}")
-        pause()
-        return
-    pause()
-    clear_screen()
-    print_header(f"RESULTS: {Style.RESET_ALL}{chosen_result_dir.name}")
 
-    # Get the directories for all the files for analysis
-    # cowrie.json
-    vanilla_json = chosen_result_dir / "vanilla" / "cowrie.json"
-    containerised_json = chosen_result_dir / "containerised" / "cowrie.json"
-    # Cowrie.log
-    vanilla_cowrie_log = chosen_result_dir / "vanilla" / "cowrie.log"
-    containerised_cowrie_log = chosen_result_dir / "containerised" / "cowrie.log"
-    
-    # /var/log/audit/audit.log
-    aa_log_path = chosen_result_dir / "containerised" / "apparmor_denials.log"
+# ------------------------------ MAIN ANALYSIS ------------------------------
+def summary_row(experiment_dir: Path, mode: str, results: dict = None, agree: dict = None,
+                denials: dict = None, latency: dict = None, error: str = None) -> dict:
+    # One row of the cross-experiment summary table (menu/batch.py)
+    results, agree, denials, latency = results or {}, agree or {}, denials or {}, latency or {}
+    return {
+        "experiment": experiment_dir.name,
+        "mode": mode,
+        "vanilla_sessions": results.get("vanilla_session_count"),
+        "containerised_sessions": results.get("containerised_session_count"),
+        "vanilla_commands": results.get("vanilla_cmd_count"),
+        "containerised_commands": results.get("containerised_cmd_count"),
+        "vanilla_avg_duration": float(results["vanilla_average_duration"]) if results else None,
+        "containerised_avg_duration": float(results["containerised_average_duration"]) if results else None,
+        "commands_match": results.get("commands_match"),
+        "hashes_match": results.get("hashes_match"),
+        "shared_hashes": len(results["shared_hashes"]) if "shared_hashes" in results else None,
+        "vanilla_log_agrees": agree.get("vanilla"),
+        "containerised_log_agrees": agree.get("containerised"),
+        "aa_denials": denials.get("aa_total", 0),
+        "seccomp_denials": denials.get("seccomp_total", 0),
+        # Sandbox overhead per command (containerised - vanilla response latency, seconds)
+        **{f"latency_delta_{p}": round(latency[p], 4) if pd.notna(latency.get(p)) else None
+           for p in ["p50", "p95", "p99"]},
+        "error": error,
+    }
 
-    vanilla_json_dataframe = parse_cowrie_json(vanilla_json)
-    vanilla_cowrie_dataframe = parse_cowrie_log(vanilla_cowrie_log)
-    containerised_json_dataframe = parse_cowrie_json(containerised_json)
-    containerised_cowrie_dataframe = parse_cowrie_log(containerised_cowrie_log)
+def report_experiment(chosen_result_dir: Path, parallel: bool = True, since=None, until=None) -> dict:
+    # Print the full analysis of one experiment and write its charts, without prompting
+    # Returns its summary_row. since/until (tz-aware) analyse only that time window
+    return report_experiment_details(chosen_result_dir, parallel, since, until)[0]
+
+def report_experiment_details(chosen_result_dir: Path, parallel: bool = True, since=None, until=None) -> tuple:
+    # report_experiment, also returning what the analysis computed on the way:
+    #   {"results", "deltas", "aa_denials", "seccomp"}, or None when there were no frames to analyse
+    #   Batch analysis draws the repeated-run samples (menu/repeats.py) from it instead of re-parsing
+    # Logs too large to hold as dataframes are streamed in batches instead
+    if needs_out_of_core(chosen_result_dir, since, until):
+        return run_chunked_analysis(chosen_result_dir, since, until), None
+
+    # Parse all five logs (in parallel for large experiments), reusing cached frames where unchanged
+    frames = load_experiment(chosen_result_dir, parallel, since, until)
+    vanilla_json_dataframe = frames["vanilla_cowrie.json"]
+    vanilla_cowrie_dataframe = frames["vanilla_cowrie.log"]
+    containerised_json_dataframe = frames["containerised_cowrie.json"]
+    containerised_cowrie_dataframe = frames["containerised_cowrie.log"]
 
     if vanilla_json_dataframe.empty or containerised_json_dataframe.empty:
         print(f"{Fore.RED}ERROR: One or both cowrie(.json)(.log) files are missing or empty.{Style.RESET_ALL}")
-        pause()
-        return
+        return summary_row(chosen_result_dir, "full", error="cowrie.json missing or empty"), None
     
     # Display the summary of the extracted json and log files
     display_summary("Vanilla", vanilla_json_dataframe, vanilla_cowrie_dataframe)
@@ -389,32 +655,82 @@ def run_analysis():
     print(f"\n{Fore.CYAN}    LOG CROSS-EXAMINATION{Style.RESET_ALL}")
     print_separator()
     print("Containerised.json == Vanilla.json?")
+    agree = {}
     if not vanilla_cowrie_dataframe.empty:
-        print_cross_check("Vanilla", cross_check(vanilla_json_dataframe, vanilla_cowrie_dataframe))
+        checked = cross_check(vanilla_json_dataframe, vanilla_cowrie_dataframe)
+        print_cross_check("Vanilla", checked)
+        agree["vanilla"] = checked["agree_flag"]
+        # Event-level join of the two logs - shows where they differ
+        print_log_join(join_frames(vanilla_json_dataframe, vanilla_cowrie_dataframe))
     if not containerised_cowrie_dataframe.empty:
-        print_cross_check("Containerised", cross_check(containerised_json_dataframe, containerised_cowrie_dataframe))
+        checked = cross_check(containerised_json_dataframe, containerised_cowrie_dataframe)
+        print_cross_check("Containerised", checked)
+        agree["containerised"] = checked["agree_flag"]
+        print_log_join(join_frames(containerised_json_dataframe, containerised_cowrie_dataframe))
        
     # Comparison between dataframes
     results = compare_data(vanilla_json_dataframe, containerised_json_dataframe)
     print_comparison(results)
 
     # Process AppArmor & Seccomp log data
-    apparmor_data_frame = parse_aa_log(aa_log_path)
+    apparmor_data_frame = frames["containerised_apparmor_denials.log"]
+    apparmor_denials = pd.DataFrame()
+    seccomp = pd.DataFrame()
+    aa_cube = denial_cube(apparmor_denials)
+    denial_results = {}
     if apparmor_data_frame.empty:
-        print(f"{Fore.Yellow}No AppArmor / Seccomp logs found. Are you sure you ran the third test?{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}No AppArmor / Seccomp logs found. Are you sure you ran the third test?{Style.RESET_ALL}")
     else:
         apparmor_denials = extract_aa_denials(apparmor_data_frame)
+        # comm x operation x name counts, built once for the report and the AppArmor charts
+        aa_cube = denial_cube(apparmor_denials)
         seccomp = extract_seccomp_bpf(apparmor_data_frame)
-        denial_results = analyse_aa_seccomp_denials(apparmor_denials, seccomp)
+        denial_results = analyse_aa_seccomp_denials(apparmor_denials, seccomp, aa_cube)
         print_denials(denial_results)
+        print_audit_events(frames["containerised_audit_events"])
 
+    # Per-command latency overhead of the sandbox, attributed to denials in the same window
+    deltas = latency_deltas(results["alignment"], vanilla_json_dataframe, containerised_json_dataframe,
+                            apparmor_denials)
+    latency = latency_summary(deltas)
+    print_latency(latency, deltas)
 
     # Call display_analysis to generate png photos
-    # Generate charts, and if AA is empty, send in an empty dataframe
-    generate_charts(chosen_result_dir, vanilla_json_dataframe, containerised_json_dataframe, 
-                    apparmor_denials if not apparmor_denials.empty else pd.DataFrame())
-
-    
-    pause()
+    # Generate charts, the AppArmor ones from the denial cube (empty without AppArmor logs)
+    generate_charts(chosen_result_dir, vanilla_json_dataframe, containerised_json_dataframe, aa_cube, parallel)
+    return (summary_row(chosen_result_dir, "full", results, agree, denial_results, latency),
+            {"results": results, "deltas": deltas, "aa_denials": apparmor_denials, "seccomp": seccomp})
     
     
+
+def run_analysis():
+    clear_screen()
+    print_header("Analysis")
+
+    # Find all directories with results
+    dirs_found = find_dirs()
+    if not dirs_found:
+        print(f"{Fore.RED}ERROR: No experiments found in: {Style.RESET_ALL} {RESULTS_DIR}")
+        pause()
+        return
+    # Print directories and cancel option
+    print(f"{Fore.CYAN}Available experiments:\n{Style.RESET_ALL}")
+    for index, dir in enumerate(dirs_found):
+        print(f"    [{index+1}] {dir.name}")
+    print(f"{Fore.YELLOW}    [0] Cancel{Style.RESET_ALL}")
+
+    choice = input(f"{Fore.CYAN}Select experiment: {Style.RESET_ALL}")
+    if choice == "0":
+        return
+    try:
+        chosen_result_dir = dirs_found[int(choice) - 1]
+        print(f"{Fore.CYAN}Analysing: {Style.RESET_ALL}{chosen_result_dir.name}")
+    except:
+        print(f"{Fore.RED}Invalid selection{Style.RESET_ALL}")
+        pause()
+        return
+    pause()
+    clear_screen()
+    print_header(f"RESULTS: {Style.RESET_ALL}{chosen_result_dir.name}")
+    report_experiment(chosen_result_dir)
+    pause()
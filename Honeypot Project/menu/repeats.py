@@ -0,0 +1,117 @@
+# ============================================================================
+# repeats.py - Statistics across repeated runs of the same payload
+# Experiments are exported as <name>_<dd-mm-yyyy>_<hhmm>, so re-running a
+#   payload on another day gives a second directory with the same name.
+#   Runs are grouped by that name and the vanilla device profile, their
+#   samples (session durations, per-command latencies, denial counts) are
+#   pooled, and each metric gets a mean, variance and bootstrap confidence
+#   interval. Resampling is one integer matrix per block of resamples.
+#   The samples come from each run's batch analysis (menu/batch.py).
+# ============================================================================
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPEATS_NAME = "repeat_statistics.csv"
+INFO_NAME = "experiment-info.txt"
+# Export timestamp appended to every experiment name (menu/export.py)
+RUN_SUFFIX = re.compile(r"_\d{2}-\d{2}-\d{4}_\d{4}$")
+# ~2 ns per resampled value: 2000 resamples of 200k pooled samples take about 4 s
+BOOTSTRAP_RESAMPLES = 2_000
+CONFIDENCE = 0.95
+# Resample matrix elements generated at once - bounds memory for runs with many samples
+BOOTSTRAP_BLOCK = 4_000_000
+# One sample is a session (durations), a shared command (latencies, seconds) or a run (denials)
+METRICS = ["vanilla_duration", "containerised_duration", "vanilla_latency", "containerised_latency",
+           "latency_delta", "aa_denials", "seccomp_denials"]
+STATISTICS_COLUMNS = ["payload", "profile", "metric", "runs", "samples", "mean", "variance", "ci_low", "ci_high"]
+
+
+def payload_name(experiment_dir: Path) -> str:
+    """The name the experiment was exported under, without its export timestamp"""
+    try:
+        with open(experiment_dir / INFO_NAME) as f:
+            for line in f:
+                if line.startswith("EXPERIMENT:"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return RUN_SUFFIX.sub("", experiment_dir.name)
+
+
+def samples_of(experiment_dir: Path, results: dict = None, deltas: pd.DataFrame = None,
+               aa_denials: pd.DataFrame = None, seccomp: pd.DataFrame = None) -> dict:
+    """One run's samples from an analysis already done (report_experiment_details in a batch
+    worker), {metric: array} plus its payload / profile key. Without results (chunked, too
+    large for memory) the run is only keyed"""
+    run = {"experiment": experiment_dir.name, "payload": payload_name(experiment_dir), "profile": ""}
+    if results is None: return run
+    # The containerised profile is fixed by the image, the vanilla one is what the run chose
+    profiles = results["vanilla_sessions"]["profile"].dropna()
+    run["profile"] = str(profiles.mode().iloc[0]) if not profiles.empty else ""
+    run.update({
+        "vanilla_duration": results["vanilla_sessions"]["duration"].to_numpy(dtype=float),
+        "containerised_duration": results["containerised_sessions"]["duration"].to_numpy(dtype=float),
+        "vanilla_latency": deltas["vanilla_latency"].to_numpy(dtype=float),
+        "containerised_latency": deltas["containerised_latency"].to_numpy(dtype=float),
+        "latency_delta": deltas["delta"].to_numpy(dtype=float),
+        "aa_denials": np.array([len(aa_denials)], dtype=float),
+        "seccomp_denials": np.array([len(seccomp)], dtype=float),
+    })
+    return run
+
+
+def bootstrap_ci(samples: np.ndarray, resamples: int = BOOTSTRAP_RESAMPLES,
+                 confidence: float = CONFIDENCE, seed: int = 0) -> tuple:
+    """Percentile bootstrap interval of the mean. Each block of resamples is one
+    (resamples x n) index matrix, so there is no Python loop per resample"""
+    samples = samples[~np.isnan(samples)]
+    n = len(samples)
+    if n == 0: return np.nan, np.nan
+    if n == 1: return float(samples[0]), float(samples[0])
+    rng = np.random.default_rng(seed)
+    means = np.empty(resamples)
+    block = max(1, BOOTSTRAP_BLOCK // n)
+    index_type = np.int32 if n < 2 ** 31 else np.int64     # half the bytes to generate and read
+    for start in range(0, resamples, block):
+        stop = min(start + block, resamples)
+        means[start:stop] = samples[rng.integers(0, n, size=(stop - start, n), dtype=index_type)].mean(axis=1)
+    tail = (1 - confidence) / 2
+    low, high = np.quantile(means, [tail, 1 - tail])
+    return float(low), float(high)
+
+
+def group_statistics(runs: list, resamples: int = BOOTSTRAP_RESAMPLES) -> pd.DataFrame:
+    """One row per (payload, profile, metric): runs, pooled sample count, mean, variance and CI"""
+    rows = []
+    keyed = pd.DataFrame([(run["payload"], run["profile"], i) for i, run in enumerate(runs)],
+                         columns=["payload", "profile", "run"])
+    for (payload, profile), members in keyed.groupby(["payload", "profile"], sort=True)["run"]:
+        group = [runs[i] for i in members]
+        for metric in METRICS:
+            parts = [run[metric] for run in group if metric in run]
+            samples = np.concatenate(parts) if parts else np.array([])
+            samples = samples[~np.isnan(samples)]
+            low, high = bootstrap_ci(samples, resamples)
+            rows.append({
+                "payload": payload, "profile": profile, "metric": metric, "runs": len(group),
+                "samples": len(samples),
+                "mean": float(samples.mean()) if len(samples) else np.nan,
+                "variance": float(samples.var(ddof=1)) if len(samples) > 1 else np.nan,
+                "ci_low": low, "ci_high": high,
+            })
+    return pd.DataFrame(rows, columns=STATISTICS_COLUMNS)
+
+
+def runs_statistics(runs: list, repeated_only: bool = True) -> pd.DataFrame:
+    """group_statistics of runs already sampled (batch analysis collects them as it goes).
+    repeated_only keeps groups with more than one run"""
+    if repeated_only:
+        names = pd.Series([run["payload"] for run in runs], dtype=object)
+        runs = [run for run, repeated in zip(runs, names.duplicated(keep=False)) if repeated]
+    statistics = group_statistics(runs)
+    if repeated_only:
+        statistics = statistics[statistics["runs"] > 1].reset_index(drop=True)
+    return statistics
@@ -11,9 +11,11 @@ from menu.config import (
     CONTAINER_NAME, CONTAINER_LOG_PATH, CONTAINER_DOWNLOADS_PATH, STAGED_DIR)
 
 from menu.utils import copy_file_from_container, list_files_in_container, clear_screen, print_header
+from menu.audit_tail import APPARMOR_NAME, BPF_NAME, stage_audit, stop_tailer
 
 def clear_app_armor_logs():
-    """Clear all AppArmor logs, and logs of type BPF for seccomp"""
+    """Clear all AppArmor logs, and logs of type BPF for seccomp.
+    No longer needed between experiments - staging only reads audit.log past its cursor"""
     clear_screen()
     print_header("Clearing AppArmor logs")
 
@@ -63,6 +65,14 @@ def stage_containerised_logs():
     else:
         print(f"{Fore.YELLOW}    cowrie.json not found in container{Style.RESET_ALL}")
 
+    # Rotated logs (logtype=rotating) - cowrie.json.YYYY-MM-DD, cowrie.log.YYYY_M_D, possibly compressed
+    rotations = [fname for fname in list_files_in_container(CONTAINER_NAME, CONTAINER_LOG_PATH)
+                 if fname.startswith(("cowrie.json.", "cowrie.log."))]
+    for fname in rotations:
+        if copy_file_from_container(CONTAINER_NAME, f"{CONTAINER_LOG_PATH}/{fname}", STAGED_DIR / fname):
+            print(f"{Fore.GREEN}    {fname}  (rotation){Style.RESET_ALL}")
+            staged += 1
+
     # downloads/
     downloads_dest = STAGED_DIR / "downloads"
     downloads_dest.mkdir(exist_ok=True)
@@ -82,42 +92,23 @@ def stage_containerised_logs():
     else:
         print(f"{Fore.YELLOW}    downloads/ is empty{Style.RESET_ALL}")
 
-    # AppArmor denials
-    aa_res = subprocess.run(
-        ["sudo", "grep", "cowrie-docker", "/var/log/audit/audit.log"],
-        capture_output=True, text=True
-    )
-    if aa_res.returncode == 0 and aa_res.stdout.strip():
-        denied = []
-        for x in aa_res.stdout.splitlines():
-            if "DENIED" in x:
-                denied.append(x)
-        if denied:
-            file_contents = ""
-            for line in denied:
-                file_contents += line + "\n"
-            (STAGED_DIR / "apparmor_denials.log").write_text(file_contents)
-            print(f"{Fore.GREEN}    apparmor_denials.log  ({len(denied)} denial(s)){Style.RESET_ALL}")
-            staged += 1
-        else:
-            print(f"{Fore.YELLOW}    apparmor_denials.log  (no DENIED entries){Style.RESET_ALL}")
-    else:
+    # AppArmor denials + Seccomp records, staged live by menu/audit_tail.py while the container ran
+    # Stop the follower and catch up on what it has not seen (only the bytes after its cursor)
+    stop_tailer(STAGED_DIR)
+    audit = stage_audit(STAGED_DIR)
+    if audit is None:
         print(f"{Fore.YELLOW}    apparmor_denials.log  (audit.log unreadable){Style.RESET_ALL}")
-
-    # Seccomp BPF events
-    bpf_res = subprocess.run(
-        ["sudo", "grep", "type=BPF", "/var/log/audit/audit.log"],
-        capture_output=True, text=True
-    )
-    if bpf_res.returncode == 0 and bpf_res.stdout.strip():
-        lines = 0
-        for line in bpf_res.stdout.splitlines():
-            lines += 1
-        (STAGED_DIR / "seccomp_bpf.log").write_text(bpf_res.stdout)
-        print(f"{Fore.GREEN}    seccomp_bpf.log       ({lines} event(s)){Style.RESET_ALL}")
-        staged += 1
     else:
-        print(f"{Fore.YELLOW}    seccomp_bpf.log       (no BPF events){Style.RESET_ALL}")
+        for fname, label in [(APPARMOR_NAME, "denial(s)"), (BPF_NAME, "event(s)")]:
+            path = STAGED_DIR / fname
+            records = path.read_bytes().count(b"\n") if path.exists() else 0
+            if records:
+                print(f"{Fore.GREEN}    {fname:<21} ({records} {label}){Style.RESET_ALL}")
+                staged += 1
+            else:
+                print(f"{Fore.YELLOW}    {fname:<21} (none){Style.RESET_ALL}")
+        rotated = " across a rotation" if audit["rotated"] else ""
+        print(f"{Fore.GREEN}    audit.log: {audit['bytes']:,} new byte(s) read{rotated}{Style.RESET_ALL}")
 
     # AppArmor profile
     profile_res = subprocess.run(
@@ -0,0 +1,69 @@
+# ============================================================================
+# syscalls.py - Architecture-aware syscall names for SECCOMP records
+# The same number is a different call on every ABI (11 is execve on i386 /
+#   arm but munmap on x86_64, mips starts at 4000), so a SECCOMP record is
+#   named by its (arch=, syscall=) pair. The per-arch tables are compiled
+#   once into one sorted int64 key array, (table << 32) | number, and a
+#   column of records is named with a single searchsorted over it.
+# https://chromium.googlesource.com/chromiumos/docs/+/master/constants/syscalls.md
+# https://syscalls.mebeim.net/?table=x86/64/x64/latest
+# ============================================================================
+import numpy as np
+import pandas as pd
+
+from menu.syscall_tables import ARM, I386, MIPS_O32, X86_64
+
+UNKNOWN = "unknown"
+TABLES = {"x86_64": X86_64, "i386": I386, "armv7l": ARM, "mips": MIPS_O32}
+# audit arch= values (AUDIT_ARCH_* in linux/audit.h, hex) -> table
+AUDIT_ARCHES = {
+    "c000003e": "x86_64",
+    "40000003": "i386",
+    "40000028": "armv7l",       # little-endian ARM
+    "28": "armv7l",             # big-endian ARM
+    "8": "mips",                # mips o32 big-endian
+    "40000008": "mips",         # mipsel o32
+}
+# Device profile / uname -m names for the same tables
+ARCH_ALIASES = {"mipsel": "mips", "arm": "armv7l", "armv7": "armv7l", "amd64": "x86_64", "i686": "i386"}
+
+
+def _compile():
+    """(sorted keys, name codes, names) over every table"""
+    names = [UNKNOWN]
+    codes_of = {UNKNOWN: 0}
+    keys, codes = [], []
+    for table_no, table in enumerate(TABLES.values()):
+        for number, name in table.items():
+            keys.append((table_no << 32) | number)
+            codes.append(codes_of.setdefault(name, len(names)))
+            if codes[-1] == len(names): names.append(name)
+    order = np.argsort(np.array(keys, dtype=np.int64), kind="stable")
+    return (np.array(keys, dtype=np.int64)[order], np.array(codes, dtype=np.int32)[order],
+            pd.Index(names))
+
+_KEYS, _CODES, _NAMES = _compile()
+_TABLE_NO = {arch: table_no for table_no, arch in enumerate(TABLES)}
+
+
+def table_of(arch) -> int:
+    """Table number for an audit arch= hex value or an arch name, -1 if unknown"""
+    arch = str(arch).strip().lower()
+    arch = AUDIT_ARCHES.get(arch.removeprefix("0x").lstrip("0") or "0", ARCH_ALIASES.get(arch, arch))
+    return _TABLE_NO.get(arch, -1)
+
+
+def syscall_names(arch: pd.Series, syscall: pd.Series) -> pd.Categorical:
+    """Name of every (arch, syscall) pair in one pass, "unknown" where either is not in a table"""
+    # Few distinct arches / numbers, so resolve those and broadcast the result (code -1 is NaN)
+    arch_codes, arch_values = pd.factorize(arch, sort=False)
+    tables = np.array([table_of(value) for value in arch_values] + [-1], dtype=np.int64)[arch_codes]
+    number_codes, number_values = pd.factorize(syscall, sort=False)
+    numbers = np.append(pd.to_numeric(pd.Series(number_values, dtype=object), errors="coerce")
+                        .to_numpy(dtype=float, na_value=np.nan), np.nan)[number_codes]
+    valid = (tables >= 0) & ~np.isnan(numbers) & (numbers >= 0)
+
+    keys = (tables << 32) | np.where(valid, numbers, 0).astype(np.int64)
+    at = np.minimum(np.searchsorted(_KEYS, keys), len(_KEYS) - 1)
+    found = valid & (_KEYS[at] == keys)
+    return pd.Categorical.from_codes(np.where(found, _CODES[at], 0), categories=_NAMES)
@@ -4,6 +4,7 @@
 # ============================================================================
 import os
 import subprocess
+import threading
  
 from colorama import Fore, Style
 
@@ -94,16 +95,47 @@ def list_files_in_container(container_name, container_path):
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
-def check_aa_profile():
+# Result of the last aa-status: None before one finished, then "loaded", "missing" or
+#   "unchecked" (sudo wanted a password / aa-status not installed). Only "loaded" is final,
+#   the others are checked again, so the check completes once sudo credentials are cached
+_aa_profile = {"status": None, "running": False}
+
+def _run_aa_status():
+    # -n: a background check must never prompt for a password behind the menu
+    try:
+        result = subprocess.run(["sudo", "-n", "aa-status"], capture_output=True, text=True,
+                                stdin=subprocess.DEVNULL)
+    except OSError:
+        _aa_profile["status"] = "unchecked"
+        return
+    finally:
+        _aa_profile["running"] = False
+    if "cowrie-docker" in result.stdout:
+        _aa_profile["status"] = "loaded"
+    else:
+        _aa_profile["status"] = "missing" if result.stdout.strip() else "unchecked"
+
+def check_aa_profile(wait: bool = False):
     """
-    Verify the cowrie-docker AppArmor profile is loaded at startup.
-    Called once when the menu launches.
+    Verify the cowrie-docker AppArmor profile is loaded.
+    Called each time the main menu is drawn until the profile is seen loaded: sudo -n only
+    succeeds once credentials are cached (starting the container runs sudo -v and checks
+    with wait=True). Runs in the background so the menu (and the killswitch) appears at
+    once - the result is shown by print_aa_profile_status()
     """
-    result = subprocess.run(
-        ["sudo", "aa-status"], capture_output=True, text=True
-    )
-    if "cowrie-docker" not in result.stdout:
+    if _aa_profile["status"] == "loaded" or _aa_profile["running"]: return
+    _aa_profile["running"] = True
+    if wait:
+        _run_aa_status()
+    else:
+        threading.Thread(target=_run_aa_status, daemon=True).start()
+
+def print_aa_profile_status():
+    """Warning lines for the main menu once the check has finished, nothing while it runs or if loaded"""
+    status = _aa_profile["status"]
+    if status == "missing":
         print(f"{Fore.RED}[!] WARNING: cowrie-docker AppArmor profile is not loaded!{Style.RESET_ALL}")
         print(f"{Fore.YELLOW}    Run: sudo apparmor_parser -r /etc/apparmor.d/containers/cowrie-docker{Style.RESET_ALL}")
-        pause()
+    elif status == "unchecked":
+        print(f"{Fore.YELLOW}[!] AppArmor profile not checked (sudo aa-status needs a password or is not installed){Style.RESET_ALL}")
 
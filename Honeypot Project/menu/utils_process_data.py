@@ -1,40 +1,238 @@
+import weakref
+from functools import reduce
+
+import numpy as np
 import pandas as pd
 
+from menu.syscalls import syscall_names
+
+# ------------------------------ COMPACT DTYPES ------------------------------
+# Low-cardinality text columns (a handful of eventids / sessions / processes) stored as categoricals
+CATEGORY_COLUMNS = {
+    # cowrie.json + cowrie.log
+    "eventid", "session", "src_ip", "dst_ip", "sensor", "protocol", "profile", "model", "instance",
+    "arch", "username", "password", "version", "hassh",
+    # AppArmor / Seccomp audit records
+    "type", "apparmor", "operation", "class", "comm", "name", "requested_mask", "denied_mask",
+    "exe", "subj", "syscall", "code",
+}
+# Audit fields that are numbers written as text
+AUDIT_NUMERIC_COLUMNS = ["pid", "fsuid", "ouid", "uid", "gid", "auid", "ses", "sig", "compat"]
+# Read by the extractors below, so kept even when a rare eventid leaves them all-NaN
+KEEP_COLUMNS = {"eventid", "timestamp", "session", "src_ip", "input", "url", "shasum", "duration",
+                "type", "operation", "name", "comm", "syscall"}
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Categorical text columns, downcast integers, drop all-NaN columns. Safe to call twice.
+    Floats (durations, sizes) stay float64: float32 noise would reach the reported means"""
+    if df.empty: return df
+    attrs = df.attrs
+    df = df.drop(columns=[c for c in df.columns if c not in KEEP_COLUMNS and df[c].isna().all()])
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+            continue
+        if column in AUDIT_NUMERIC_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+            dtype = df[column].dtype
+        if column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype("category")
+        elif pd.api.types.is_integer_dtype(dtype):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    df.attrs = attrs
+    return df
+
+
+def concat_frames(frames: list) -> pd.DataFrame:
+    """pd.concat that keeps categorical columns categorical by unioning their categories first"""
+    frames = [frame for frame in frames if not frame.empty]
+    if len(frames) <= 1: return frames[0] if frames else pd.DataFrame()
+    columns = reduce(lambda a, b: a.union(b, sort=False), [frame.columns for frame in frames])
+    for column in columns:
+        dtypes = [frame[column].dtype for frame in frames if column in frame.columns]
+        if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes): continue
+        categories = reduce(lambda a, b: a.union(b, sort=False), [dtype.categories for dtype in dtypes])
+        merged_dtype = pd.CategoricalDtype(categories)
+        for i, frame in enumerate(frames):
+            frame = frame.copy(deep=False)
+            frame[column] = (frame[column].astype(merged_dtype) if column in frame.columns
+                             else pd.Series(pd.NA, index=frame.index, dtype=merged_dtype))
+            frames[i] = frame
+    return pd.concat(frames, ignore_index=True)
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Bytes held by a frame, including the Python strings inside object columns"""
+    return int(df.memory_usage(deep=True).sum()) if not df.empty else 0
+
+
+def _observed(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop categories no row uses any more, so value_counts() on a filtered frame has no zero rows"""
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+
+# ------------------------------ PARTITION INDEX ------------------------------
+# Row positions per eventid (or audit type), built with one groupby pass the first time a frame
+#   is asked for and shared by every extractor and chart afterwards. Keyed by id(frame) and
+#   dropped when the frame is garbage collected - parsed frames are never modified in place
+_partitions = {}
+
+def partition_index(df: pd.DataFrame, column: str = "eventid") -> dict:
+    """{value: row positions} for one column of a parsed frame, in first-seen order"""
+    key = (id(df), column)
+    index = _partitions.get(key)
+    if index is None:
+        if df.empty or column not in df.columns:
+            index = {}
+        else:
+            index = df.groupby(column, observed=True, sort=False).indices
+        _partitions[key] = index
+        weakref.finalize(df, _partitions.pop, key, None)
+    return index
+
+def rows_of(df: pd.DataFrame, value: str, column: str = "eventid") -> pd.DataFrame:
+    """Rows of df where column == value, read from the partition index instead of a full-frame mask"""
+    positions = partition_index(df, column).get(value)
+    if positions is None: return df.iloc[0:0]
+    return df.take(positions)
+
+def event_counts(df: pd.DataFrame, column: str = "eventid") -> pd.Series:
+    """value_counts() of column, taken from the partition index sizes"""
+    index = partition_index(df, column)
+    counts = pd.Series({value: len(positions) for value, positions in index.items()}, dtype="int64")
+    # Stable sort keeps first-seen order for ties, like value_counts on the raw strings did
+    return counts.sort_values(ascending=False, kind="stable")
+
+
+# ------------------------------ SESSION SUMMARY ------------------------------
+# One row per session, built with a single groupby pass the first time it is asked for and
+#   cached per frame like the partition index. compare_data, the charts and reports read
+#   session facts from here instead of re-aggregating the raw events
+_session_tables = {}
+SESSION_COLUMNS = ["session", "src_ip", "connect_time", "close_time", "duration", "command_count",
+                   "first_command", "last_command", "download_count", "login", "profile"]
+
+def _event_mask(df: pd.DataFrame, eventids: list) -> pd.Series:
+    """True on rows of the given eventids - the per-session counters / flags sum or any() it"""
+    mask = np.zeros(len(df), dtype=bool)
+    index = partition_index(df)
+    for eventid in eventids:
+        mask[index.get(eventid, [])] = True
+    return pd.Series(mask, index=df.index)
+
+def _where_event(df: pd.DataFrame, column: str, eventids: list) -> pd.Series:
+    """df[column] on rows of the given eventids, NA everywhere else (all NA if the column is missing)"""
+    if column not in df.columns: return pd.Series(pd.NA, index=df.index, dtype=object)
+    return df[column].where(_event_mask(df, eventids).to_numpy())
+
+def session_count(df: pd.DataFrame) -> int:
+    """Sessions in df, counted by their cowrie.session.connect event (one each). The in-memory
+    and chunked (menu/chunked.py) reports both count this way - a batch cannot tell whether a
+    session id it sees already appeared in an earlier batch, but a connect is only logged once"""
+    if df.empty or "eventid" not in df.columns: return 0
+    return len(partition_index(df).get("cowrie.session.connect", []))
+
+def session_summary(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-session table: src_ip, connect/close time, duration, command count, first/last command
+    time, download count, login outcome (success / failed / none) and device profile"""
+    cached = _session_tables.get(id(df))
+    if cached is not None: return cached
+    if df.empty or "session" not in df.columns:
+        table = pd.DataFrame(columns=SESSION_COLUMNS)
+    else:
+        work = pd.DataFrame({
+            "session": df["session"],
+            "src_ip": df["src_ip"] if "src_ip" in df.columns else pd.NA,
+            "connect_time": _where_event(df, "timestamp", ["cowrie.session.connect"]),
+            "close_time": _where_event(df, "timestamp", ["cowrie.session.closed"]),
+            "duration": pd.to_numeric(_where_event(df, "duration", ["cowrie.session.closed"]), errors="coerce"),
+            "command": _event_mask(df, ["cowrie.command.input"]),
+            "command_time": _where_event(df, "timestamp", ["cowrie.command.input"]),
+            "download": _event_mask(df, ["cowrie.session.file_download"]),
+            "login_success": _event_mask(df, ["cowrie.login.success"]),
+            "login_failed": _event_mask(df, ["cowrie.login.failed"]),
+            "profile": _where_event(df, "profile", ["cowrie.session.profile"]),
+        })
+        table = work.groupby("session", observed=True, sort=False).agg(
+            src_ip=("src_ip", "first"),
+            connect_time=("connect_time", "min"),
+            close_time=("close_time", "max"),
+            duration=("duration", "max"),
+            command_count=("command", "sum"),
+            first_command=("command_time", "min"),
+            last_command=("command_time", "max"),
+            download_count=("download", "sum"),
+            login_success=("login_success", "any"),
+            login_failed=("login_failed", "any"),
+            profile=("profile", "first"),
+        ).reset_index()
+        table["login"] = np.select([table["login_success"], table["login_failed"]], ["success", "failed"], "none")
+        table = _observed(table.sort_values("connect_time", kind="stable", na_position="last")
+                          [SESSION_COLUMNS].reset_index(drop=True))
+    _session_tables[id(df)] = table
+    weakref.finalize(df, _session_tables.pop, id(df), None)
+    return table
+
+
 # ------------------------------ DATA EXTRACTION ------------------------------
 # Each extraction filter was produced from manually examining the .json logs
 def extract_commands(df: pd.DataFrame) -> pd.DataFrame:
-    # Create boolean mask. only lines marked cowrie.command.input are true
-    mask = df["eventid"] == "cowrie.command.input"
-    # (1) Only keep rows that match true to the mask
-    # (2) Selects only the three columns
-    return df[mask][["session", "timestamp", "input"]].reset_index(drop=True)
+    # Only rows marked cowrie.command.input (from the partition index)
+    # Selects only the three columns
+    commands = rows_of(df, "cowrie.command.input")
+    return _observed(commands.reindex(columns=["session", "timestamp", "input"]).reset_index(drop=True))
 
 def extract_downloads(df: pd.DataFrame) -> pd.DataFrame:
-    # Create boolean mask for cowrie.session.file_download
-    mask = df["eventid"] == "cowrie.session.file_download"
+    # Rows for cowrie.session.file_download
     columns = [c for c in ["session", "timestamp", "url", "shasum"] if c in df.columns]
-    return df[mask][columns].reset_index(drop=True)
+    return _observed(rows_of(df, "cowrie.session.file_download")[columns].reset_index(drop=True))
 
 def extract_sessions(df: pd.DataFrame) -> pd.DataFrame:
-    connecting = df[df["eventid"] == "cowrie.session.connect"][["session", "timestamp", "src_ip"]].rename(columns={"timestamp": "connect_time"})
-    closed_session = df[df["eventid"] == "cowrie.session.closed"][["session", "duration"]].copy()
-
-    closed_session["duration"] = pd.to_numeric(closed_session["duration"], errors="coerce")
-    return connecting.merge(closed_session, on="session", how="left")
+    # Connect time, source IP and duration per session, read from the session summary table
+    return session_summary(df)[["session", "connect_time", "src_ip", "duration"]]
 
 def extract_aa_denials(aa_df : pd.DataFrame) -> pd.DataFrame:
     # If logs are empty, or no 'type' (AVC) exists, return empty
     if aa_df.empty or "type" not in aa_df.columns: return pd.DataFrame()
-    filt = aa_df["type"] == "AVC"
     # Iterate through all possible AVC columns and for each column that matches log, set true
     cols = [c for c in ["timestamp","operation", "name", "comm", "profile", "requested_mask", "denied_mask"]
                if c in aa_df.columns]
-    return aa_df[filt][cols].reset_index(drop=True)
+    return _observed(rows_of(aa_df, "AVC", "type")[cols].reset_index(drop=True))
 
 def extract_seccomp_bpf(seccomp_df : pd.DataFrame) -> pd.DataFrame:
     # If logs are empty, or no 'type' (SECCOMP) exists, return empty
     if seccomp_df.empty or "type" not in seccomp_df.columns: return pd.DataFrame()
-    filt = seccomp_df["type"] == "SECCOMP"
-    cols = [c for c in ["timestamp", "syscall", "comm", "sig", "exe"]
+    cols = [c for c in ["timestamp", "arch", "syscall", "comm", "sig", "exe"]
             if c in seccomp_df.columns]
-    return seccomp_df[filt][cols].reset_index(drop=True)
+    seccomp = rows_of(seccomp_df, "SECCOMP", "type")[cols].reset_index(drop=True)
+    # Name each record from its own ABI's table, the number alone is ambiguous
+    if "syscall" in seccomp.columns:
+        arch = seccomp["arch"] if "arch" in seccomp.columns else pd.Series(pd.NA, index=seccomp.index)
+        seccomp["syscall_name"] = syscall_names(arch, seccomp["syscall"])
+    return _observed(seccomp)
+
+
+# ------------------------------ DENIAL CUBE ------------------------------
+# AppArmor denial counts per (process, operation, path), built with one groupby over the denials.
+#   The denial report, the chunked summary and the AppArmor charts all sum it down to the
+#   levels they need instead of masking the full frame once per process / operation
+DENIAL_CUBE_LEVELS = ["comm", "operation", "name"]
+
+def denial_cube(aa_denials: pd.DataFrame) -> pd.Series:
+    """Count of every (comm, operation, name) seen in extract_aa_denials' rows, in first-seen order.
+    A missing column or value is a NaN key, so every denial is counted once"""
+    if aa_denials.empty:
+        return pd.Series([], dtype="int64",
+                         index=pd.MultiIndex.from_arrays([[], [], []], names=DENIAL_CUBE_LEVELS))
+    keys = aa_denials.reindex(columns=DENIAL_CUBE_LEVELS)
+    return keys.groupby(DENIAL_CUBE_LEVELS, observed=True, sort=False, dropna=False).size()
+
+def cube_counts(cube: pd.Series, *levels: str) -> pd.Series:
+    """The cube summed onto some of its levels, most frequent first like value_counts (NaN keys dropped)"""
+    counts = cube.groupby(level=list(levels), sort=False).sum()
+    # Stable sort keeps first-seen order for ties
+    return counts.sort_values(ascending=False, kind="stable")
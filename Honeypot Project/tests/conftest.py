@@ -0,0 +1,8 @@
+# ============================================================================
+# conftest.py - Makes the menu package importable when pytest runs from tests/
+#     python3 -m pytest tests
+# ============================================================================
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,91 @@
+# ============================================================================
+# test_align.py - Myers diff, its positional fallback and move detection
+# ============================================================================
+import random
+
+import pandas as pd
+
+from menu import align
+from menu.align import EQUAL, DELETE, INSERT, myers_diff, align_commands, streams_match
+
+
+def _apply(a: list, b: list, script: list) -> list:
+    """b rebuilt from the script, checking every equal step pairs equal tokens"""
+    out = []
+    for op, i, j in script:
+        if op == EQUAL:
+            assert a[i] == b[j]
+        if op in (EQUAL, INSERT):
+            out.append(b[j])
+    assert [i for op, i, _ in script if op in (EQUAL, DELETE)] == list(range(len(a)))
+    return out
+
+
+def _edit_distance(a: list, b: list) -> int:
+    """Inserts + deletes only, through the longest common subsequence"""
+    lcs = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for x in range(len(a) - 1, -1, -1):
+        for y in range(len(b) - 1, -1, -1):
+            lcs[x][y] = lcs[x + 1][y + 1] + 1 if a[x] == b[y] else max(lcs[x + 1][y], lcs[x][y + 1])
+    return len(a) + len(b) - 2 * lcs[0][0]
+
+
+def test_myers_diff_is_a_shortest_edit_script():
+    rng = random.Random(7)
+    for _ in range(200):
+        a = [rng.randrange(4) for _ in range(rng.randrange(12))]
+        b = [rng.randrange(4) for _ in range(rng.randrange(12))]
+        script = myers_diff(a, b)
+        assert _apply(a, b, script) == b
+        assert sum(op != EQUAL for op, _, _ in script) == _edit_distance(a, b)
+
+
+def test_myers_diff_keeps_common_prefix_and_suffix():
+    script = myers_diff([1, 2, 3, 9, 4, 5], [1, 2, 3, 4, 5])
+    assert script == [(EQUAL, 0, 0), (EQUAL, 1, 1), (EQUAL, 2, 2), (DELETE, 3, -1), (EQUAL, 4, 3), (EQUAL, 5, 4)]
+
+
+def test_myers_diff_gives_up_beyond_max_edits():
+    assert myers_diff([1, 2, 3], [4, 5, 6], max_edits=5) is None
+    assert myers_diff([1, 2, 3], [4, 5, 6], max_edits=6) is not None
+
+
+def _commands(session: str, inputs: list, start: str = "2026-01-01T00:00:00Z") -> tuple:
+    """Command rows one second apart and the session table align_commands expects"""
+    zero = pd.Timestamp(start)
+    cmds = pd.DataFrame({"session": session, "input": inputs,
+                         "timestamp": [zero + pd.Timedelta(seconds=n + 1) for n in range(len(inputs))]})
+    return cmds, pd.DataFrame({"session": [session], "connect_time": [zero]})
+
+
+def test_align_commands_reports_moves():
+    v_cmds, v_sessions = _commands("v1", ["ls", "uname -a", "wget x"])
+    c_cmds, c_sessions = _commands("c1", ["uname -a", "wget x", "ls"])
+    alignment = align_commands(v_cmds, c_cmds, v_sessions, c_sessions)
+    moved = alignment[alignment["op"] == "moved"]
+    assert moved["command"].tolist() == ["ls"]
+    assert moved["vanilla_time"].tolist() == [1.0] and moved["containerised_time"].tolist() == [3.0]
+    assert (alignment["op"] == "equal").sum() == 2
+    assert not {"deleted", "inserted"} & set(alignment["op"])
+    assert not streams_match(alignment)
+
+
+def test_align_commands_matches_identical_streams():
+    v_cmds, v_sessions = _commands("v1", ["ls", "ls", "cat /etc/passwd"])
+    c_cmds, c_sessions = _commands("c1", ["ls", "ls", "cat /etc/passwd"], "2026-01-01T00:05:00Z")
+    alignment = align_commands(v_cmds, c_cmds, v_sessions, c_sessions)
+    assert streams_match(alignment)
+    assert alignment["delta"].tolist() == [0.0, 0.0, 0.0]
+    assert alignment.attrs["approximate"] == []
+
+
+def test_align_commands_falls_back_to_positions(monkeypatch):
+    exact = align.myers_diff
+    monkeypatch.setattr(align, "myers_diff", lambda a, b: exact(a, b, max_edits=1))
+    v_cmds, v_sessions = _commands("v1", ["ls", "id", "whoami"])
+    c_cmds, c_sessions = _commands("c1", ["ls", "whoami", "id", "uptime"])
+    alignment = align_commands(v_cmds, c_cmds, v_sessions, c_sessions)
+    assert alignment.attrs["approximate"] == [0]
+    # Index by index: ls equal, id / whoami swapped (moved both ways), uptime only containerised
+    assert alignment["op"].tolist() == ["equal", "moved", "moved", "inserted"]
+    assert alignment["command"].tolist() == ["ls", "whoami", "id", "uptime"]
@@ -0,0 +1,125 @@
+# ============================================================================
+# test_audit_tail.py - Event correlation across passes and the byte cursor
+# sync_audit runs against an audit.log in tmp_path; the staging area is a
+#   sibling directory, as RESULTS_DIR/staged is for the real tailer.
+# ============================================================================
+import os
+
+from menu.audit_tail import APPARMOR_NAME, BPF_NAME, load_cursor, split_records, sync_audit
+
+AVC = (b'type=AVC msg=audit(1700000000.100:%d): apparmor="DENIED" operation="open" '
+       b'profile="cowrie-docker" name="/etc/rc.local" comm="sh"\n')
+SECCOMP = b"type=SECCOMP msg=audit(1700000000.200:%d): subj=cowrie-docker arch=40000003 syscall=11\n"
+SYSCALL = b"type=SYSCALL msg=audit(1700000000.100:%d): arch=c000003e syscall=2 success=no\n"
+BPF = b"type=BPF msg=audit(1700000000.300:%d): prog-id=5 op=LOAD\n"
+
+
+def _staged(staged_dir, name=APPARMOR_NAME) -> bytes:
+    path = staged_dir / name
+    return path.read_bytes() if path.exists() else b""
+
+
+def test_split_records_keeps_records_of_anchor_events():
+    data = AVC % 1 + SYSCALL % 1 + SYSCALL % 2 + SECCOMP % 3 + BPF % 4
+    apparmor, bpf = split_records(data)
+    assert apparmor == AVC % 1 + SYSCALL % 1 + SECCOMP % 3
+    assert bpf == BPF % 4
+
+
+def test_split_records_ignores_other_profiles():
+    other = AVC.replace(b"cowrie-docker", b"snap.firefox") % 1
+    assert split_records(other + SYSCALL % 1) == (b"", b"")
+
+
+def test_split_records_carries_events_across_passes():
+    events = {}
+    first, _ = split_records(AVC % 7, events)
+    # The SYSCALL record of event 7 only arrives in the next pass
+    second, _ = split_records(SYSCALL % 7 + SYSCALL % 8, events)
+    assert first == AVC % 7
+    assert second == SYSCALL % 7
+    assert list(events) == [b"1700000000.100:7"]
+
+
+def test_sync_audit_reads_only_appended_bytes(tmp_path):
+    audit_log, staged = tmp_path / "audit.log", tmp_path / "staged"
+    audit_log.write_bytes(AVC % 1 + BPF % 2)
+    first = sync_audit(staged, audit_log)
+    assert (first["apparmor"], first["bpf"]) == (1, 1)
+
+    with open(audit_log, "ab") as log:
+        log.write(SYSCALL % 1 + SECCOMP % 3)
+    second = sync_audit(staged, audit_log)
+    assert second["bytes"] == len(SYSCALL % 1 + SECCOMP % 3)
+    assert _staged(staged) == AVC % 1 + SYSCALL % 1 + SECCOMP % 3
+    assert _staged(staged, BPF_NAME) == BPF % 2
+    assert load_cursor(staged)["offset"] == audit_log.stat().st_size
+    assert sync_audit(staged, audit_log)["bytes"] == 0
+
+
+def test_sync_audit_from_end_skips_history(tmp_path):
+    audit_log, staged = tmp_path / "audit.log", tmp_path / "staged"
+    audit_log.write_bytes(AVC % 1)
+    assert sync_audit(staged, audit_log, from_end=True)["bytes"] == 0
+    with open(audit_log, "ab") as log:
+        log.write(AVC % 2)
+    sync_audit(staged, audit_log, from_end=True)
+    assert _staged(staged) == AVC % 2
+
+
+def test_sync_audit_leaves_partial_line_for_next_pass(tmp_path):
+    audit_log, staged = tmp_path / "audit.log", tmp_path / "staged"
+    line = AVC % 1
+    audit_log.write_bytes(line[:20])
+    assert sync_audit(staged, audit_log)["bytes"] == 0
+    assert load_cursor(staged)["offset"] == 0
+    with open(audit_log, "ab") as log:
+        log.write(line[20:])
+    sync_audit(staged, audit_log)
+    assert _staged(staged) == line
+
+
+def test_sync_audit_correlates_events_split_across_passes(tmp_path):
+    audit_log, staged = tmp_path / "audit.log", tmp_path / "staged"
+    audit_log.write_bytes(AVC % 1)
+    sync_audit(staged, audit_log)
+    # The anchor is remembered in the cursor file, not just in memory
+    assert load_cursor(staged)["events"] == ["1700000000.100:1"]
+    with open(audit_log, "ab") as log:
+        log.write(SYSCALL % 1)
+    sync_audit(staged, audit_log)
+    assert _staged(staged) == AVC % 1 + SYSCALL % 1
+
+
+def test_sync_audit_finishes_rotated_file_then_reads_new_one(tmp_path):
+    audit_log, staged = tmp_path / "audit.log", tmp_path / "staged"
+    audit_log.write_bytes(AVC % 1)
+    sync_audit(staged, audit_log)
+    # Written after the last pass, then auditd renames and creates a fresh audit.log
+    with open(audit_log, "ab") as log:
+        log.write(SYSCALL % 1 + AVC % 2)
+    os.rename(audit_log, tmp_path / "audit.log.1")
+    audit_log.write_bytes(SYSCALL % 2 + AVC % 3)
+    result = sync_audit(staged, audit_log)
+    assert result["rotated"]
+    assert _staged(staged) == AVC % 1 + SYSCALL % 1 + AVC % 2 + SYSCALL % 2 + AVC % 3
+    assert load_cursor(staged)["inode"] == audit_log.stat().st_ino
+
+
+def test_sync_audit_restarts_after_truncation(tmp_path):
+    audit_log, staged = tmp_path / "audit.log", tmp_path / "staged"
+    audit_log.write_bytes(AVC % 1 + AVC % 2)
+    sync_audit(staged, audit_log)
+    audit_log.write_bytes(AVC % 3)      # truncated in place, same inode, now shorter
+    sync_audit(staged, audit_log)
+    assert _staged(staged) == AVC % 1 + AVC % 2 + AVC % 3
+
+
+def test_sync_audit_streams_in_blocks(tmp_path, monkeypatch):
+    audit_log, staged = tmp_path / "audit.log", tmp_path / "staged"
+    data = b"".join(AVC % n + SYSCALL % n + BPF % (n + 1000) for n in range(50))
+    audit_log.write_bytes(data)
+    monkeypatch.setattr("menu.audit_tail.READ_BYTES", 37)
+    result = sync_audit(staged, audit_log)
+    assert result["bytes"] == len(data)
+    assert _staged(staged) == b"".join(AVC % n + SYSCALL % n for n in range(50))
@@ -0,0 +1,39 @@
+# ============================================================================
+# test_syscalls.py - Syscall names looked up by (arch, number)
+# ============================================================================
+import numpy as np
+import pandas as pd
+
+from menu.syscalls import UNKNOWN, syscall_names, table_of
+
+
+def test_table_of_audit_arches_and_names():
+    assert table_of("c000003e") == table_of("0xC000003E") == table_of("x86_64") == table_of("amd64")
+    assert table_of("40000003") == table_of("i686") == table_of("i386")
+    assert table_of("40000028") == table_of("28") == table_of("arm") == table_of("armv7l")
+    assert table_of("8") == table_of("40000008") == table_of("mipsel") == table_of("mips")
+    assert len({table_of(arch) for arch in ("x86_64", "i386", "armv7l", "mips")}) == 4
+    assert table_of("c00000b7") == -1       # aarch64 has no table
+    assert table_of(None) == -1
+
+
+def test_same_number_is_named_per_arch():
+    arch = pd.Series(["c000003e", "40000003", "40000028", "40000008", "c000003e"])
+    syscall = pd.Series(["11", "11", "11", "4011", "59"])
+    assert list(syscall_names(arch, syscall)) == ["munmap", "execve", "execve", "execve", "execve"]
+
+
+def test_arm_private_calls():
+    names = syscall_names(pd.Series(["40000028"]), pd.Series([0x0F0005]))
+    assert list(names) == ["set_tls"]
+
+
+def test_unknown_arch_number_or_value():
+    arch = pd.Series(["c00000b7", "c000003e", "c000003e", "c000003e", None, "8"])
+    syscall = pd.Series(["59", "99999", "abc", np.nan, "59", "11"])
+    assert list(syscall_names(arch, syscall)) == [UNKNOWN] * 6
+
+
+def test_empty_columns():
+    names = syscall_names(pd.Series([], dtype=object), pd.Series([], dtype=object))
+    assert len(names) == 0